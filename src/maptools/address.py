@@ -1,14 +1,20 @@
+import sys
 import warnings
 import re
+from functools import lru_cache
+from collections import namedtuple
+import numpy as np
+import pandas as pd
 
 from shapely import Point
+import geopandas as gpd
+
+from . import download
+from . import geocache
 
 # USPS Street Suffix Abbreviations
 # https://pe.usps.com/text/pub28/28apc_002.htm
-# this most be sorted by length, longest first
-# t = [(sfx, len(sfx)) for sfx in address.USPS_STREET_SUFF]
-# t.sort(key=lambda x: x[1])
-# [x[0] for x in x]
+# the order doesn't matter, matching uses the index built by `_suffix_index`
 
 USPS_STREET_SUFF = ['TERRACE PLACE', 'TRAFFICWAY', 'THROUGHWAY', 'EXTENSIONS', 'EXPRESSWAY', "CONCOURSE",
     'CROSSROADS', 'BOULEVARD ', 'STRAVENUE', 'CROSSROAD', 'EXTENSION', 'CROSSING ', 
@@ -65,11 +71,209 @@ USPS_STREET_SUFF = ['TERRACE PLACE', 'TRAFFICWAY', 'THROUGHWAY', 'EXTENSIONS', '
     'ANX', 'AV', 'VW', 'WY', 'ST', 'SQ', 'PT', 'RD', 'PR', 'PL', 'UN', 'MT', 'LN', 'LF', 
     'LK', 'KY', 'HT', 'IS', 'HL', 'FT', 'CV', 'DR', 'DV', 'CT', 'CP', 'BR', 'VL']
 
+# USPS standard suffix abbreviation -> the names and variants that mean it
+# https://pe.usps.com/text/pub28/28apc_002.htm
+USPS_STANDARD_SUFF = {
+    'ALY': ['ALLEE', 'ALLEY', 'ALLY'], 'ANX': ['ANEX', 'ANNEX', 'ANNX'], 'ARC': ['ARCADE'],
+    'AVE': ['AV', 'AVEN', 'AVENU', 'AVENUE', 'AVN', 'AVNUE'], 'BYU': ['BAYOO', 'BAYOU'],
+    'BCH': ['BEACH'], 'BND': ['BEND'], 'BLF': ['BLUF', 'BLUFF'], 'BLFS': ['BLUFFS'],
+    'BTM': ['BOT', 'BOTTM', 'BOTTOM'], 'BLVD': ['BOUL', 'BOULEVARD', 'BOULV'],
+    'BR': ['BRNCH', 'BRANCH'], 'BRG': ['BRDGE', 'BRIDGE'], 'BRK': ['BROOK'], 'BRKS': ['BROOKS'],
+    'BG': ['BURG'], 'BGS': ['BURGS'], 'BYP': ['BYPA', 'BYPAS', 'BYPASS', 'BYPS'],
+    'CP': ['CAMP', 'CMP'], 'CYN': ['CANYN', 'CANYON', 'CNYN'], 'CPE': ['CAPE'],
+    'CSWY': ['CAUSEWAY', 'CAUSWA'], 'CTR': ['CEN', 'CENT', 'CENTER', 'CENTR', 'CENTRE', 'CNTER', 'CNTR'],
+    'CTRS': ['CENTERS'], 'CIR': ['CIRC', 'CIRCL', 'CIRCLE', 'CRCL', 'CRCLE'], 'CIRS': ['CIRCLES'],
+    'CLF': ['CLIFF'], 'CLFS': ['CLIFFS'], 'CLB': ['CLUB'], 'CMN': ['COMMON'], 'CMNS': ['COMMONS'],
+    'COR': ['CORNER'], 'CORS': ['CORNERS'], 'CRSE': ['COURSE'], 'CT': ['COURT'], 'CTS': ['COURTS'],
+    'CV': ['COVE'], 'CVS': ['COVES'], 'CRK': ['CREEK'], 'CRES': ['CRESCENT', 'CRSENT', 'CRSNT'],
+    'CRST': ['CREST'], 'XING': ['CROSSING', 'CRSSNG'], 'XRD': ['CROSSROAD'], 'XRDS': ['CROSSROADS'],
+    'CURV': ['CURVE'], 'DL': ['DALE'], 'DM': ['DAM'], 'DV': ['DIV', 'DIVIDE', 'DVD'],
+    'DR': ['DRIV', 'DRIVE', 'DRV'], 'DRS': ['DRIVES'], 'EST': ['ESTATE'], 'ESTS': ['ESTATES'],
+    'EXPY': ['EXP', 'EXPR', 'EXPRESS', 'EXPRESSWAY', 'EXPW'], 'EXT': ['EXTENSION', 'EXTN', 'EXTNSN'],
+    'EXTS': ['EXTENSIONS'], 'FLS': ['FALLS'], 'FRY': ['FERRY', 'FRRY'], 'FLD': ['FIELD'],
+    'FLDS': ['FIELDS'], 'FLT': ['FLAT'], 'FLTS': ['FLATS'], 'FRD': ['FORD'], 'FRDS': ['FORDS'],
+    'FRST': ['FOREST', 'FORESTS'], 'FRG': ['FORG', 'FORGE'], 'FRGS': ['FORGES'], 'FRK': ['FORK'],
+    'FRKS': ['FORKS'], 'FT': ['FORT', 'FRT'], 'FWY': ['FREEWAY', 'FREEWY', 'FRWAY', 'FRWY'],
+    'GDN': ['GARDEN', 'GARDN', 'GRDEN', 'GRDN'], 'GDNS': ['GARDENS', 'GRDNS'],
+    'GTWY': ['GATEWAY', 'GATEWY', 'GATWAY', 'GTWAY'], 'GLN': ['GLEN'], 'GLNS': ['GLENS'],
+    'GRN': ['GREEN'], 'GRNS': ['GREENS'], 'GRV': ['GROV', 'GROVE'], 'GRVS': ['GROVES'],
+    'HBR': ['HARB', 'HARBOR', 'HARBR', 'HRBOR'], 'HBRS': ['HARBORS'], 'HVN': ['HAVEN'],
+    'HTS': ['HT', 'HEIGHTS'], 'HWY': ['HIGHWAY', 'HIGHWY', 'HIWAY', 'HIWY', 'HWAY'],
+    'HL': ['HILL'], 'HLS': ['HILLS'], 'HOLW': ['HLLW', 'HOLLOW', 'HOLLOWS', 'HOLWS'],
+    'INLT': ['INLET'], 'IS': ['ISLAND', 'ISLND'], 'ISS': ['ISLANDS', 'ISLNDS'], 'ISLE': ['ISLES'],
+    'JCT': ['JCTION', 'JCTN', 'JUNCTION', 'JUNCTN', 'JUNCTON'], 'JCTS': ['JCTNS', 'JUNCTIONS'],
+    'KY': ['KEY'], 'KYS': ['KEYS'], 'KNL': ['KNOL', 'KNOLL'], 'KNLS': ['KNOLLS'], 'LK': ['LAKE'],
+    'LKS': ['LAKES'], 'LNDG': ['LANDING', 'LNDNG'], 'LN': ['LANE'], 'LGT': ['LIGHT'],
+    'LGTS': ['LIGHTS'], 'LF': ['LOAF'], 'LCK': ['LOCK'], 'LCKS': ['LOCKS'],
+    'LDG': ['LDGE', 'LODG', 'LODGE'], 'LOOP': ['LOOPS'], 'MNR': ['MANOR'], 'MNRS': ['MANORS'],
+    'MDW': ['MEADOW'], 'MDWS': ['MEADOWS', 'MEDOWS'], 'ML': ['MILL'], 'MLS': ['MILLS'],
+    'MSN': ['MISSION', 'MISSN', 'MSSN'], 'MTWY': ['MOTORWAY'], 'MT': ['MNT', 'MOUNT'],
+    'MTN': ['MNTAIN', 'MNTN', 'MOUNTAIN', 'MOUNTIN', 'MTIN'], 'MTNS': ['MNTNS', 'MOUNTAINS'],
+    'NCK': ['NECK'], 'ORCH': ['ORCHARD', 'ORCHRD'], 'OVAL': ['OVL'], 'OPAS': ['OVERPASS'],
+    'PARK': ['PRK', 'PARKS'], 'PKWY': ['PARKWAY', 'PARKWY', 'PKWAY', 'PKY', 'PARKWAYS', 'PKWYS'],
+    'PSGE': ['PASSAGE'], 'PATH': ['PATHS'], 'PIKE': ['PIKES'], 'PNE': ['PINE'], 'PNES': ['PINES'],
+    'PL': ['PLACE'], 'PLN': ['PLAIN'], 'PLNS': ['PLAINS'], 'PLZ': ['PLAZA', 'PLZA'], 'PT': ['POINT'],
+    'PTS': ['POINTS'], 'PRT': ['PORT'], 'PRTS': ['PORTS'], 'PR': ['PRAIRIE', 'PRR'],
+    'RADL': ['RAD', 'RADIAL', 'RADIEL'], 'RNCH': ['RANCH', 'RANCHES', 'RNCHS'], 'RPD': ['RAPID'],
+    'RPDS': ['RAPIDS'], 'RST': ['REST'], 'RDG': ['RDGE', 'RIDGE'], 'RDGS': ['RIDGES'],
+    'RIV': ['RIVER', 'RVR', 'RIVR'], 'RD': ['ROAD'], 'RDS': ['ROADS'], 'RTE': ['ROUTE'],
+    'SHL': ['SHOAL'], 'SHLS': ['SHOALS'], 'SHR': ['SHOAR', 'SHORE'], 'SHRS': ['SHOARS', 'SHORES'],
+    'SKWY': ['SKYWAY'], 'SPG': ['SPNG', 'SPRING', 'SPRNG'], 'SPGS': ['SPNGS', 'SPRINGS', 'SPRNGS'],
+    'SPUR': ['SPURS'], 'SQ': ['SQR', 'SQRE', 'SQU', 'SQUARE'], 'SQS': ['SQRS', 'SQUARES'],
+    'STA': ['STATION', 'STATN', 'STN'], 'STRA': ['STRAV', 'STRAVEN', 'STRAVENUE', 'STRAVN', 'STRVN', 'STRVNUE'],
+    'STRM': ['STREAM', 'STREME'], 'ST': ['STREET', 'STRT', 'STR'], 'STS': ['STREETS'],
+    'SMT': ['SUMIT', 'SUMITT', 'SUMMIT'], 'TER': ['TERR', 'TERRACE'], 'TRWY': ['THROUGHWAY'],
+    'TRCE': ['TRACE', 'TRACES'], 'TRAK': ['TRACK', 'TRACKS', 'TRK', 'TRKS'], 'TRFY': ['TRAFFICWAY'],
+    'TRL': ['TRAIL', 'TRAILS', 'TRLS'], 'TRLR': ['TRAILER', 'TRLRS'],
+    'TUNL': ['TUNEL', 'TUNLS', 'TUNNEL', 'TUNNELS', 'TUNNL'], 'TPKE': ['TRNPK', 'TURNPIKE', 'TURNPK'],
+    'UPAS': ['UNDERPASS'], 'UN': ['UNION'], 'UNS': ['UNIONS'], 'VLY': ['VALLEY', 'VALLY', 'VLLY'],
+    'VLYS': ['VALLEYS'], 'VIA': ['VDCT', 'VIADCT', 'VIADUCT'], 'VW': ['VIEW'], 'VWS': ['VIEWS'],
+    'VLG': ['VILL', 'VILLAG', 'VILLAGE', 'VILLG', 'VILLIAGE'], 'VLGS': ['VILLAGES'], 'VL': ['VILLE'],
+    'VIS': ['VIST', 'VISTA', 'VST', 'VSTA'], 'WALK': ['WALKS'], 'WAY': ['WY'], 'WL': ['WELL'],
+    'WLS': ['WELLS'],
+}
+
+# every suffix spelling -> its USPS standard abbreviation
+USPS_SUFFIX_ABBR = {v: std for std, variants in USPS_STANDARD_SUFF.items() for v in variants + [std]}
+
+DIRECTIONS = {"NORTH": "N", "SOUTH": "S", "EAST": "E", "WEST": "W",
+              "NORTHEAST": "NE", "NORTHWEST": "NW", "SOUTHEAST": "SE", "SOUTHWEST": "SW"}
+
+
+# distinct values each normalization function remembers
+NORMALIZE_CACHE_SIZE = 2 ** 16
+
+
+def _intern(value):
+    """Intern a string so repeated values share one object."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def standard_suffix(sfx):
+    """The USPS standard abbreviation of a street suffix, e.g. "STREET" -> "ST"."""
+    sfx = sfx.strip().upper()
+    return USPS_SUFFIX_ABBR.get(sfx, sfx)
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_street(name):
+    """
+    Normalize a street name (without the house number) so that different
+    spellings of the same street compare equal, e.g. "West 22 Street",
+    "W 22nd St." and "W 22ND ST" are all "W 22ND ST".
+    Directions at the start or end become their abbreviation, the last
+    word is replaced with its USPS standard suffix, and a number followed
+    by more words is made ordinal.
+
+    Parameters:
+    -----------
+    name : str
+        The street name, e.g. the TIGER/Line FULLNAME or the street from
+        `parse_address` without its house number.
+
+    Returns:
+    --------
+    str
+    """
+    words = [w.rstrip(".,") for w in name.upper().split()]
+    words = [w for w in words if w]
+    if not words:
+        return ""
+    if words[0] in DIRECTIONS and len(words) > 2:
+        words[0] = DIRECTIONS[words[0]]
+    if words[-1] in DIRECTIONS and len(words) > 2:
+        words[-1] = DIRECTIONS[words[-1]]
+    last = len(words) - 1
+    if words[last] in DIRECTIONS.values() and last > 1:
+        last -= 1
+    words[last] = USPS_SUFFIX_ABBR.get(words[last], words[last])
+    for i, word in enumerate(words[:last]):
+        if word.isdigit():
+            words[i] = word + ordinal_suffix(int(word)).upper()
+    return _intern(" ".join(words))
+
+
+# words that start the unit part of a street address, suffixes after them are ignored
+UNIT_WORDS = {"APT", "APARTMENT", "UNIT", "STE", "SUITE", "FL", "FLOOR", "RM", "ROOM",
+              "BLDG", "BUILDING", "DEPT", "PH", "LOWR", "UPPR", "REAR", "FRNT", "#"}
+
+
+def _suffix_index(suffixes):
+    """
+    Index the suffixes by their first word, each entry holding
+    the word tuples that start with it, longest first.
+    e.g. {"TERRACE": [("TERRACE", "PLACE"), ("TERRACE",)], ...}
+    """
+    index = {}
+    for sfx in suffixes:
+        words = tuple(sfx.split())
+        index.setdefault(words[0], set()).add(words)
+    return {k: sorted(v, key=len, reverse=True) for k, v in index.items()}
+
+
+SUFFIX_INDEX = _suffix_index(USPS_STREET_SUFF)
+
+
+def _find_suffix(words):
+    """
+    Find the street suffix in a list of upper case words.
+    Only whole words match; at each position the longest suffix wins,
+    and the last match before any unit words (APT, FL, ...) is used.
+
+    Returns:
+    --------
+    tuple of (int, int) or None
+        The start and end word positions of the suffix.
+    """
+    found = None
+    i = 0
+    while i < len(words):
+        word = words[i]
+        if word.startswith("#") or word in UNIT_WORDS:
+            break
+        step = 1
+        for candidate in SUFFIX_INDEX.get(word.rstrip("."), []):
+            if tuple(w.rstrip(".") for w in words[i:i + len(candidate)]) == candidate:
+                found = (i, i + len(candidate))
+                # words inside a multi word suffix can't start another one
+                step = len(candidate)
+                break
+        i += step
+    return found
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def split_street(street):
+    """
+    Split a street address into the street name, street type and unit.
+    e.g. "179 LIVINGSTON ST 7FL" -> ("179 LIVINGSTON", "ST", "7FL")
+    Results are cached (see `normalize_cache_info`) and the strings interned.
+
+    Returns:
+    --------
+    tuple of (str, str, str)
+        The name, the suffix, and the unit (or `None`).
+        The suffix is "" if no street type is found.
+    """
+    words = street.split()
+    found = _find_suffix([w.upper() for w in words])
+    if found is None:
+        return _intern(street.strip()), "", None
+    start, end = found
+    sfx = " ".join(w.upper().rstrip(".") for w in words[start:end])
+    unit = " ".join(words[end:]) or None
+    return _intern(" ".join(words[:start])), _intern(sfx), _intern(unit)
+
+
 def street_suffix(street):
     """
     Get the street type from the street name.
     e.g. "W 22 ST" -> "ST"
 
+    Only whole words are matched (so "MAINSTREAM" doesn't match "STREAM"),
+    the longest suffix wins, and a suffix in the unit part of the
+    address is ignored.
+
     Parameters:
     -----------
     street : str
@@ -81,28 +285,101 @@ def street_suffix(street):
         The street type.
     """
     street = street.strip().upper()
-    for suffix in USPS_STREET_SUFF:
-        if suffix in street:
-            return suffix
-    
-    warnings.warn(f"Could not find street type in {street}")
-    return ""
+    name, sfx, unit = split_street(street)
+    if not sfx:
+        warnings.warn(f"Could not find street type in {street}")
+    return sfx
 
 
-def ord(n):
-    if 10 <= n % 100 <= 20:  # the teens are different
-        return 'th'
-    d = n % 10
-    if d == 1:
-        return 'st'
-    if d == 2:
-        return 'nd'
-    if d == 3:
-        return 'rd'
-    return 'th'
+def street_suffixes(streets):
+    """
+    Get the street type of every street in a Series.
+    Each distinct street is only matched once.
 
+    Parameters:
+    -----------
+    streets : pandas.Series
+        The street names to parse.
 
-def reverse(row, geocoder, addr_field="address", timeout=20, viewbox=None, multiple=False):
+    Returns:
+    --------
+    pandas.Series
+        The street types, "" where none is found and `NA` for missing streets.
+    """
+    codes, uniques = pd.factorize(streets.str.strip().str.upper())
+    found = np.array([split_street(u)[1] for u in uniques] + [pd.NA], dtype=object)
+    result = pd.Series(found[codes], index=streets.index, dtype="string")
+    missing = (result == "").sum()
+    if missing:
+        warnings.warn(f"Could not find street type in {missing} streets")
+    return result
+
+
+# a cached geocode result, with the attributes of a geopy Location that we use
+Location = namedtuple("Location", ["latitude", "longitude"])
+
+
+# ordinal endings indexed by the last digit, "th" for 0 and 4-9
+ORDINAL_SUFFIXES = np.array(["th", "st", "nd", "rd"])
+
+# a number at the end of a street name, after another word
+# (a lone number is the house number, e.g. "1 BROADWAY")
+NUMBERED_RE = re.compile(r'(?<=\s)(\d+)$')
+
+
+def ordinal_suffixes(numbers):
+    """
+    The ordinal endings of an array of integers, e.g. [1, 12, 22] -> ["st", "th", "nd"].
+
+    Parameters:
+    -----------
+    numbers : array-like of int
+
+    Returns:
+    --------
+    numpy.ndarray of str
+    """
+    n = np.abs(np.asarray(numbers, dtype=np.int64))
+    last = n % 10
+    teens = (n % 100 >= 10) & (n % 100 <= 20)  # the teens are different
+    return ORDINAL_SUFFIXES[np.where(teens | (last > 3), 0, last)]
+
+
+def ordinal_suffix(n):
+    """The ordinal ending of an integer, e.g. 22 -> "nd"."""
+    n = abs(n)
+    last = n % 10
+    if 10 <= n % 100 <= 20 or last > 3:
+        return "th"
+    return str(ORDINAL_SUFFIXES[last])
+
+
+def ordinalize(names, suffixes=None):
+    """
+    Convert numbered street names to ordinal form, e.g. "100 W 22" -> "100 W 22nd".
+
+    Parameters:
+    -----------
+    names : pandas.Series
+        Street names without their suffix (see `split_street`).
+    suffixes : pandas.Series
+        The street suffixes. Numbered BROADWAY addresses are left alone.
+
+    Returns:
+    --------
+    pandas.Series of string
+    """
+    names = names.astype("string")
+    numbers = names.str.extract(NUMBERED_RE, expand=False)
+    numbered = numbers.notna()
+    if suffixes is not None:
+        numbered &= (suffixes != "BROADWAY").fillna(False)
+    endings = pd.Series(pd.NA, index=names.index, dtype="string")
+    endings[numbered] = ordinal_suffixes(numbers[numbered].astype("int64").to_numpy())
+    return names.where(~numbered, names + endings)
+
+
+def reverse(row, geocoder, addr_field="address", timeout=20, viewbox=None, multiple=False, cache=None):
     """
     Run a reverse geocode on an address from a dataframe row.
     Creates a new column called `geometry` with the result as a `shapely.geometry.Point` object.
@@ -127,6 +404,9 @@ def reverse(row, geocoder, addr_field="address", timeout=20, viewbox=None, multi
         - `full_address` : the full address, multiline address (with unit number)
         - `lat` : the latitude
         - `lon` : the longitude
+    cache : bool or str
+        Use the geocode cache (see `geocache`): `True` for the default
+        database or the path of a database.
 
     Returns:
     --------
@@ -147,19 +427,26 @@ def reverse(row, geocoder, addr_field="address", timeout=20, viewbox=None, multi
     #     return row
     
     addr = parse_address(x)
-    addr["postalcode"] = addr["zip"]
 
     if not addr:
-        print("Invalid address:", addr)
+        print("Invalid address:", x)
         return row
+    addr["postalcode"] = addr["zip"]
 
     loc = None
-    if viewbox:
-        # loc = geocoder.geocode(addr["lookup"], timeout=20, viewbox=viewbox, bounded=True)
-        loc = geocoder.geocode(addr, timeout=20, viewbox=viewbox, bounded=True)
+    cache_file = cache if isinstance(cache, str) else None
+    key = geocache.cache_key(addr["lookup"], viewbox)
+    hit = geocache.get_many([key], cache_file).get(key) if cache else None
+    if hit:
+        loc = Location(hit["lat"], hit["lon"]) if hit["found"] else None
+    elif viewbox:
+        # loc = geocoder.geocode(addr["lookup"], timeout=timeout, viewbox=viewbox, bounded=True)
+        loc = geocoder.geocode(addr, timeout=timeout, viewbox=viewbox, bounded=True)
     else:
-        loc = geocoder.geocode(addr, timeout=20)
-        # loc = geocoder.geocode(addr["lookup"], timeout=20)
+        loc = geocoder.geocode(addr, timeout=timeout)
+        # loc = geocoder.geocode(addr["lookup"], timeout=timeout)
+    if cache and not hit:
+        geocache.put_many([{"key": key, "lookup": addr["lookup"], "viewbox": viewbox, "location": loc}], cache_file)
     
     if not loc or not addr or not addr["lookup"]:
         print(f"""
@@ -178,11 +465,17 @@ failed to geocode: {addr["lookup"]}
     row["full_address"] = f"""{addr["street"]}{unit}\n{addr["city"]}, {addr["state"]} {addr["zip"]}"""
     return row
 
+# the fields returned by `parse_address`
+ADDRESS_FIELDS = ["lookup", "street", "unit", "city", "state", "zip"]
+
+
 def parse_address(addr):
     """
     Parse an address into its components.
     Look for an apartment or unit number.
     Convert numbered street names to ordinal form. (W 22 ST -> W 22ND ST)
+    Results are cached (see `normalize_cache_info`), so a repeated
+    address is only parsed once.
 
     Parameters:
     -----------
@@ -201,6 +494,18 @@ def parse_address(addr):
         - zip_code
     
     """
+    try:
+        parts = _parse_address(addr)
+    except TypeError:  # not hashable, so not an address
+        return None
+    if parts is None:
+        return None
+    return dict(zip(ADDRESS_FIELDS, parts))
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _parse_address(addr):
+    """`parse_address` as a tuple of interned strings in the order of `ADDRESS_FIELDS`."""
     clean = apt = street = city = state = zip_code = None
     try:
         street, city, state_zip = addr.split(", ")
@@ -210,19 +515,14 @@ def parse_address(addr):
         state = state.strip()
         zip_code = zip_code.strip()
 
-        sfx = street_suffix(street)
-        parts = street.split(sfx)
-
-        street_name = parts[0].strip()
-        if len(parts) > 1:
-            apt = parts[1].strip()
+        street_name, sfx, apt = split_street(street)
+        if not sfx:
+            warnings.warn(f"Could not find street type in {street}")
+            raise ValueError(f"No street type in {street}")
         
-        match = re.search(r'\d+$', street_name)
-        if match:
-            numbered_street = match.group(0)
-            if sfx != "BROADWAY":
-                ordinal = ord(int(numbered_street))
-                street_name += ordinal
+        match = NUMBERED_RE.search(street_name)
+        if match and sfx != "BROADWAY":
+            street_name += ordinal_suffix(int(match.group(0)))
         
         street = f"{street_name} {sfx}".strip()
         clean = f"{street}, {city}, {state} {zip_code}"
@@ -231,11 +531,200 @@ def parse_address(addr):
         # warnings.warn("Could not parse address:" + str(addr), stacklevel=1)
         return None
 
-    m = dict()
-    m["lookup"] = clean
-    m["street"] = street
-    m["unit"] = apt
-    m["city"] = city
-    m["state"] = state
-    m["zip"] = zip_code
-    return m
\ No newline at end of file
+    return tuple(_intern(v) for v in (clean, street, apt, city, state, zip_code))
+
+
+def normalize_cache_info():
+    """
+    Report how well the address normalization caches are working.
+
+    Returns:
+    --------
+    dict
+        For each cached function (`parse_address`, `split_street` and
+        `normalize_street`) a dict with hits, misses, size, maxsize and
+        hit_rate (hits / calls, `None` before the first call).
+    """
+    caches = {"parse_address": _parse_address, "split_street": split_street,
+              "normalize_street": normalize_street}
+    report = {}
+    for name, func in caches.items():
+        info = func.cache_info()
+        calls = info.hits + info.misses
+        report[name] = {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "maxsize": info.maxsize,
+            "hit_rate": info.hits / calls if calls else None,
+        }
+    return report
+
+
+def normalize_cache_clear():
+    """Empty the address normalization caches."""
+    for func in [_parse_address, split_street, normalize_street]:
+        func.cache_clear()
+
+
+# "179 Livingston St, Brooklyn, NY 11201" (the format `parse_address` accepts)
+ADDRESS_RE = re.compile(r'^\s*(?P<street>(?:(?!, ).)+), (?P<city>(?:(?!, ).)+), (?P<state>[^ ]+) (?P<zip>[^ ]+)\s*$')
+
+
+def parse_addresses(addresses, categorical=False):
+    """
+    Parse a Series of addresses into their components.
+    This is the bulk version of `parse_address`: the address is split with
+    one regex pass over the whole Series and each distinct street is
+    only split into name, type and unit once (and not again in later
+    calls while it is in the `split_street` cache).
+
+    Parameters:
+    -----------
+    addresses : pandas.Series
+        The addresses to parse, e.g. "179 Livingston St 7th Fl, Brooklyn, NY 11201"
+    categorical : bool
+        Return the columns as categoricals, which take much less memory
+        than strings when values repeat (the same cities, states and streets).
+
+    Returns:
+    --------
+    DataFrame
+        With the same index as `addresses` and the columns
+        street, unit, city, state, zip, lookup (see `parse_address`) and
+        status, one of:
+        - ok: the address was parsed
+        - missing: the address is empty
+        - unparsed: the address isn't in the "street, city, state zip" format
+        - no_suffix: no street type was found in the street
+        Columns other than status are `NA` unless the status is ok.
+    """
+    addresses = addresses.astype("string")
+    parts = addresses.str.extract(ADDRESS_RE)
+    parts = parts.apply(lambda col: col.str.strip())
+
+    codes, uniques = pd.factorize(parts.street)
+    split = [split_street(u) for u in uniques] + [(pd.NA, pd.NA, pd.NA)]
+    name, sfx, unit = (np.array(col, dtype=object)[codes] for col in zip(*split))
+    name = pd.Series(name, index=addresses.index, dtype="string")
+    sfx = pd.Series(sfx, index=addresses.index, dtype="string")
+    unit = pd.Series(unit, index=addresses.index, dtype="string")
+
+    name = ordinalize(name, sfx)
+
+    street = name + " " + sfx
+    result = pd.DataFrame({
+        "street": street,
+        "unit": unit,
+        "city": parts.city,
+        "state": parts.state,
+        "zip": parts.zip,
+        "lookup": street + ", " + parts.city + ", " + parts.state + " " + parts.zip,
+    }, index=addresses.index)
+
+    status = pd.Series("ok", index=addresses.index, dtype="string")
+    status[(sfx == "").fillna(False)] = "no_suffix"
+    status[parts.street.isna()] = "unparsed"
+    status[(addresses.str.strip() == "").fillna(True)] = "missing"
+    result.loc[(status != "ok").to_numpy(dtype=bool)] = pd.NA
+    result["status"] = status
+    if categorical:
+        result = result.astype("category")
+    return result
+
+
+def _is_transient(e):
+    from geopy.exc import GeocoderTimedOut, GeocoderUnavailable, GeocoderRateLimited
+    return isinstance(e, (GeocoderTimedOut, GeocoderUnavailable, GeocoderRateLimited)) \
+        or download.is_transient(e)
+
+
+def geocode(df, geocoder, addr_field="address", max_workers=4, timeout=10, retries=2,
+            rate=None, viewbox=None, progress=None, cache=None):
+    """
+    Geocode every address in a DataFrame.
+    Addresses are parsed in bulk (see `parse_addresses`) and each distinct
+    lookup address is geocoded once. Requests run in a bounded thread pool,
+    each with its own timeout, and are rate limited and retried on
+    timeouts and unavailable / rate limited responses.
+
+    Parameters:
+    -----------
+    df : DataFrame
+        The data to geocode.
+    geocoder : geopy.geocoders
+        The geocoder to use, e.g. `Nominatim` pointed at a local service.
+    addr_field : str
+        The column name of the address field.
+    max_workers : int
+        The number of concurrent requests. Default is 4.
+    timeout : int
+        The timeout, in seconds, of each request.
+    retries : int
+        The number of retries for a request that times out.
+    rate : float
+        The maximum number of requests per second. Default is no limit.
+    viewbox : tuple of float
+        The viewbox to limit the search. If not provided, the geocoder's default is used.
+    progress : callable
+        Called as `progress(done, total, lookup, error)` after each request.
+    cache : bool or str
+        Use the geocode cache (see `geocache`): `True` for the default
+        database or the path of a database. Cached hits and unexpired
+        misses aren't sent to the geocoder; new hits and misses are stored.
+
+    Returns:
+    --------
+    GeoDataFrame
+        A copy of `df` with the columns `geometry`, `lat`, `lon`, `lookup_address`
+        and `status`, which is "ok", "not_found", "error", or the parse status
+        of an address that couldn't be parsed (see `parse_addresses`).
+    """
+    parsed = parse_addresses(df[addr_field])
+    ok = parsed[parsed.status == "ok"]
+    queries = ok.drop_duplicates("lookup").set_index("lookup")
+
+    kwargs = {"timeout": timeout}
+    if viewbox:
+        kwargs.update(viewbox=viewbox, bounded=True)
+
+    def lookup(key):
+        addr = queries.loc[key]
+        query = {"street": addr.street, "city": addr.city, "state": addr.state, "postalcode": addr.zip}
+        return key, geocoder.geocode(query, **kwargs)
+
+    cache_file = cache if isinstance(cache, str) else None
+    keys = {lookup: geocache.cache_key(lookup, viewbox) for lookup in queries.index}
+    cached = geocache.get_many(keys.values(), cache_file) if cache else {}
+    todo = [lookup for lookup in queries.index if keys[lookup] not in cached]
+
+    results, failures = download.fetch_all(
+        todo, lookup, max_workers=max_workers, retries=retries,
+        rate=rate, progress=progress, transient=_is_transient)
+
+    if cache:
+        rows = [{"key": keys[key], "lookup": key, "viewbox": viewbox, "location": loc} for key, loc in results]
+        geocache.put_many(rows, cache_file)
+
+    found = {key: (loc.latitude, loc.longitude) for key, loc in results if loc}
+    for key in queries.index:
+        hit = cached.get(keys[key])
+        if hit and hit["found"]:
+            found[key] = (hit["lat"], hit["lon"])
+    lat = parsed.lookup.map({key: ll[0] for key, ll in found.items()})
+    lon = parsed.lookup.map({key: ll[1] for key, ll in found.items()})
+
+    errors = {f["item"] for f in failures}
+    status = parsed.status.copy()
+    status[parsed.status == "ok"] = "not_found"
+    status[parsed.lookup.isin(found.keys()).fillna(False)] = "ok"
+    status[parsed.lookup.isin(errors).fillna(False)] = "error"
+
+    result = df.copy()
+    result["lat"] = lat.astype(float)
+    result["lon"] = lon.astype(float)
+    result["lookup_address"] = parsed.lookup
+    result["status"] = status
+    geometry = gpd.points_from_xy(result.lon, result.lat)
+    geometry[result.lat.isna().to_numpy()] = None
+    return gpd.GeoDataFrame(result, geometry=geometry, crs="EPSG:4326")
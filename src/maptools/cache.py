@@ -0,0 +1,296 @@
+import os
+import os.path
+import json
+import time
+import hashlib
+import tempfile
+import threading
+import warnings
+import requests
+import geopandas as gpd
+
+# Root of the census.gov TIGER/Line and cartographic boundary tree.
+# Point this at a local HTTP server (or set MAPTOOLS_TIGER_URL) to work offline.
+TIGER_URL = os.environ.get("MAPTOOLS_TIGER_URL", "https://www2.census.gov/geo/tiger")
+
+CACHE_DIR = os.environ.get("MAPTOOLS_CACHE_DIR",
+                           os.path.join(os.path.expanduser("~"), ".cache", "maptools"))
+
+# total size of cached boundary files, in bytes, before LRU eviction kicks in
+CACHE_SIZE = int(os.environ.get("MAPTOOLS_CACHE_SIZE", 5 * 1024 ** 3))
+
+# seconds before a cached file is revalidated against the server
+MAX_AGE = 24 * 60 * 60
+
+# serializes read-modify-write of the index between threads in one process
+_index_lock = threading.Lock()
+
+
+def cache_dir(*parts):
+    """
+    Get (and create) a directory inside the maptools cache.
+
+    Parameters:
+    -----------
+    parts : str
+        Path components below the cache root, e.g. `cache_dir("boundaries")`
+
+    Returns:
+    --------
+    str
+        The absolute path of the directory.
+    """
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def boundary_url(dataset, vintage, statefp=None, resolution=None):
+    """
+    Build the census.gov url for a boundary file.
+
+    Parameters:
+    -----------
+    dataset : str
+        The TIGER/Line directory name, e.g. "state", "county", "tract", "place", "bg".
+    vintage : int
+        The year of the boundary file.
+    statefp : str
+        The state (or county) FIPS code for per-state files. Default is the national file.
+    resolution : str
+        For cartographic boundary files, the resolution ("500k", "5m", "20m").
+        If `None` a TIGER/Line file is used.
+
+    Returns:
+    --------
+    str
+        The url of the .zip archive.
+    """
+    area = statefp if statefp else "us"
+    if resolution:
+        return f"{TIGER_URL}/GENZ{vintage}/shp/cb_{vintage}_{area}_{dataset.lower()}_{resolution}.zip"
+    return f"{TIGER_URL}/TIGER{vintage}/{dataset.upper()}/tl_{vintage}_{area}_{dataset.lower()}.zip"
+
+
+def _root():
+    return cache_dir("boundaries")
+
+
+def _index_path():
+    return os.path.join(_root(), "index.json")
+
+
+def _load_index():
+    try:
+        with open(_index_path(), "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save_index(index):
+    # write to a temp file and swap it in so concurrent readers never see a partial index
+    fd, tmp = tempfile.mkstemp(dir=_root(), suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp, _index_path())
+
+
+def _update_index(key, entry):
+    with _index_lock:
+        index = _load_index()
+        index[key] = entry
+        _save_index(index)
+
+
+def _blob_path(digest, ext):
+    return os.path.join(cache_dir("boundaries", "blobs", digest[:2]), digest + ext)
+
+
+def _key(dataset, vintage, statefp=None, resolution=None):
+    parts = [dataset.lower(), str(vintage), statefp or "us"]
+    if resolution:
+        parts.append(resolution)
+    return "/".join(parts)
+
+
+def _store(response, ext):
+    """Stream the response body into a content-addressed blob, return (digest, size)."""
+    sha = hashlib.sha256()
+    fd, tmp = tempfile.mkstemp(dir=_root(), suffix=ext)
+    size = 0
+    with os.fdopen(fd, "wb") as file:
+        for chunk in response.iter_content(chunk_size=1024 * 1024):
+            if chunk:
+                sha.update(chunk)
+                file.write(chunk)
+                size += len(chunk)
+    digest = sha.hexdigest()
+    path = _blob_path(digest, ext)
+    if os.path.exists(path):
+        os.remove(tmp)
+    else:
+        os.replace(tmp, path)
+    return digest, size
+
+
+def fetch(dataset, vintage, statefp=None, resolution=None, url=None, max_age=None, session=None):
+    """
+    Get the local path of a boundary file, downloading it only if
+    it is not in the cache or has changed on the server.
+
+    Files are stored by the sha256 of their contents and indexed by
+    dataset, vintage and state. Entries older than `max_age` seconds
+    are revalidated with a conditional request (ETag / Last-Modified);
+    a `304 Not Modified` response reuses the cached copy. If the server
+    can't be reached the cached copy is used with a warning.
+
+    Parameters:
+    -----------
+    dataset : str
+        The TIGER/Line directory name, e.g. "state", "county", "tract".
+    vintage : int
+        The year of the boundary file.
+    statefp : str
+        The state FIPS code for per-state files. Default is the national file.
+    resolution : str
+        The resolution of a cartographic boundary file, e.g. "500k". Default is TIGER/Line.
+    url : str
+        Download from this url instead of the one built by `boundary_url`.
+    max_age : int
+        Seconds before a cached file is revalidated. Default is `MAX_AGE`.
+    session : requests.Session
+        The session to use for the request.
+
+    Returns:
+    --------
+    str
+        The path to the cached .zip archive.
+    """
+    if max_age is None:
+        max_age = MAX_AGE
+    if url is None:
+        url = boundary_url(dataset, vintage, statefp, resolution)
+    http = session or requests
+    key = _key(dataset, vintage, statefp, resolution)
+    ext = os.path.splitext(url)[1] or ".zip"
+
+    index = _load_index()
+    entry = index.get(key)
+    now = time.time()
+    if entry and not os.path.exists(_blob_path(entry["sha256"], ext)):
+        entry = None
+
+    if entry and entry["url"] == url and now - entry["checked"] < max_age:
+        entry["accessed"] = now
+        _update_index(key, entry)
+        return _blob_path(entry["sha256"], ext)
+
+    headers = {}
+    if entry and entry["url"] == url:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        with http.get(url, headers=headers, stream=True, timeout=60) as response:
+            if response.status_code == 304 and entry:
+                entry["checked"] = entry["accessed"] = now
+            else:
+                response.raise_for_status()
+                digest, size = _store(response, ext)
+                entry = {
+                    "url": url,
+                    "sha256": digest,
+                    "size": size,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "checked": now,
+                    "accessed": now,
+                }
+    except requests.RequestException as e:
+        if not entry:
+            raise
+        warnings.warn(f"Could not revalidate {url}, using cached copy: {e}")
+        entry["accessed"] = now
+
+    _update_index(key, entry)
+    evict()
+    return _blob_path(entry["sha256"], ext)
+
+
+def read(dataset, vintage, statefp=None, resolution=None, **kwargs):
+    """
+    Read a boundary file through the cache.
+    Extra keyword arguments are passed to `geopandas.read_file`.
+
+    Returns:
+    --------
+    GeoDataFrame
+    """
+    path = fetch(dataset, vintage, statefp, resolution)
+    return gpd.read_file(path, **kwargs)
+
+
+def evict(max_bytes=None):
+    """
+    Remove the least recently used boundary files until
+    the cache is smaller than `max_bytes`. Blobs no longer
+    referenced by the index are always removed.
+
+    Parameters:
+    -----------
+    max_bytes : int
+        The size limit of the cache. Default is `CACHE_SIZE`.
+
+    Returns:
+    --------
+    int
+        The number of bytes in the cache after eviction.
+    """
+    if max_bytes is None:
+        max_bytes = CACHE_SIZE
+    with _index_lock:
+        return _evict(max_bytes)
+
+
+def _evict(max_bytes):
+    index = _load_index()
+    entries = sorted(index.items(), key=lambda kv: kv[1]["accessed"])
+
+    blobs = {}
+    for key, entry in entries:
+        blobs.setdefault(entry["sha256"], entry["size"])
+    total = sum(blobs.values())
+
+    removed = False
+    evicted = set()
+    while total > max_bytes and entries:
+        key, entry = entries.pop(0)
+        del index[key]
+        removed = True
+        if not any(e["sha256"] == entry["sha256"] for k, e in entries):
+            total -= blobs.pop(entry["sha256"])
+            evicted.add(entry["sha256"])
+    if removed:
+        _save_index(index)
+
+    # other orphans younger than an hour may belong to a download
+    # in another process that hasn't updated the index yet
+    cutoff = time.time() - 60 * 60
+    blob_root = os.path.join(_root(), "blobs")
+    for dirpath, dirnames, filenames in os.walk(blob_root):
+        for filename in filenames:
+            digest = os.path.splitext(filename)[0]
+            path = os.path.join(dirpath, filename)
+            if digest in evicted or (digest not in blobs
+                                     and (max_bytes == 0 or os.path.getmtime(path) < cutoff)):
+                os.remove(path)
+    return total
+
+
+def clear():
+    """Remove every boundary file from the cache."""
+    _save_index({})
+    evict(0)
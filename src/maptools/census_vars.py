@@ -1,58 +1,143 @@
+import os
+import tempfile
 import pandas as pd
 import geopandas as gpd
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import numpy as np
+import pickle
 import re
 import us
 import warnings
 
+from . import cache
+from . import download
+
 census_vars = None
 census_tables = None
 
 
-# http://api.census.gov/data/2022/acs/acs5/variables.json
+# bump when the columns stored in the catalog cache change
+CATALOG_VERSION = 1
+API_URL = "https://api.census.gov/data"
+
+# the most variables the Census API returns in one request
+MAX_VARIABLES = 50
+
+_catalogs = {}
+_variables_links = {}
+_search_indexes = {}
+
+
+def variables_url(year=2022, dataset="acs/acs5", product=None):
+    """
+    Build the url of a Census API `variables.json` document,
+    e.g. `variables_url(2022, "acs/acs5", "subject")` is
+    http://api.census.gov/data/2022/acs/acs5/subject/variables.json
+    """
+    product = f"/{product}" if product else ""
+    return f"{API_URL}/{year}/{dataset}{product}/variables.json"
+
+
+def _variables_link(meta):
+    """Get the variables.json url for a dataset metadata url (looked up once per url)."""
+    if meta.endswith("variables.json"):
+        return meta
+    if not meta.endswith(".json"):
+        return meta.rstrip("/") + "/variables.json"
+    if meta not in _variables_links:
+        response = requests.get(meta, timeout=60)
+        response.raise_for_status()
+        _variables_links[meta] = response.json()["dataset"][0]["c_variablesLink"]
+    return _variables_links[meta]
+
+
+def _catalog_path(url):
+    # http://api.census.gov/data/2022/acs/acs5/subject/variables.json -> 2022_acs_acs5_subject.parquet
+    key = url.split("/data/", 1)[-1].replace("/variables.json", "")
+    key = re.sub(r'[^a-zA-Z0-9]+', '_', key)
+    return os.path.join(cache.cache_dir("catalog", f"v{CATALOG_VERSION}"), f"{key}.parquet")
+
+
+def _download_catalog(url):
+    response = requests.get(url, timeout=60)
+    response.raise_for_status()
+    t = response.json()["variables"]
+
+    cv = pd.DataFrame.from_dict(t, orient="index")
+    cv.index.name = "var"
+    cv = cv.reset_index()
+    for col in ["label", "concept", "predicateType", "group", "limit", "attributes", "predicateOnly"]:
+        if col not in cv.columns:
+            cv[col] = None
+    cv.rename(columns={"predicateType": "type"}, inplace=True)
+    labels = cv.label.fillna("")
+    cv["var_name"] = labels.map(nice_name)
+    cv["col_name"] = labels.map(col_name)
+    cv["limit"] = pd.to_numeric(cv["limit"], errors="coerce")
+    cv["attributes"] = cv["attributes"].astype("string")
+    cv["predicateOnly"] = cv["predicateOnly"].fillna(False).astype(bool)
+    cols = ['var', 'group', 'concept', 'label', 'var_name', 'col_name', 'type', 'limit', 'attributes', 'predicateOnly']
+    return cv[cols]
+
+
+def catalog(url=None, refresh=False):
+    """
+    Get the variable catalog of a Census API dataset as a DataFrame
+    with one row per variable. Catalogs are loaded lazily and kept in
+    memory and in an on-disk parquet cache, keyed by the dataset, year
+    and product in the url, so each one is only downloaded once.
+
+    Parameters:
+    -----------
+    url : str
+        The `variables.json` url, or the dataset url (e.g. http://api.census.gov/data/2022/acs/acs5/profile).
+        Default is the 2022 ACS 5-year detailed tables.
+    refresh : bool
+        Download the catalog again, replacing the cached copy.
+
+    Returns:
+    --------
+    DataFrame
+        Columns: var, group, concept, label, var_name, col_name, type, limit, attributes, predicateOnly
+    """
+    url = _variables_link(url or variables_url())
+    if url in _catalogs and not refresh:
+        return _catalogs[url]
+
+    path = _catalog_path(url)
+    if os.path.exists(path) and not refresh:
+        cv = pd.read_parquet(path)
+    else:
+        cv = _download_catalog(url)
+        # a unique temp file, so workers starting at once don't write over each other
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".parquet")
+        os.close(fd)
+        cv.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+
+    _catalogs[url] = cv
+    return cv
+
 
 def _init_vars():
     global census_vars
     global census_tables
-    details = "https://api.census.gov/data/2022/acs/acs5/variables.json"
-    subjects = "https://api.census.gov/data/2022/acs/acs5/subject/variables.json"
-    urls = [details, subjects]
+    details = variables_url(2022, "acs/acs5")
+    subjects = variables_url(2022, "acs/acs5", "subject")
+
     def load_meta(url):
-        response = requests.get(url)
-        data = response.json()
-        t = data["variables"]
-        # var_names = [k for k in t.keys() if k.startswith("B")]
-
-        # cols = ['var', 'label', 'concept', 'type', 'group', 'limit', 'attributes']
-
-        def make_row(var, data):
-            return {
-                "var": var,
-                "label": data.get("label", None),
-                "concept": data.get("concept", None),
-                "var_name": nice_name(data.get("label", None)),
-                "type": data.get("predicateType", None),
-                "group": data.get("group", None),
-                "limit": data.get("limit", None),
-                "attributes": data.get("attributes", None)
-            }
-
-
-        rows = [make_row(k, v) for k, v in t.items()]
-        cv = pd.DataFrame(data=rows)
+        cv = catalog(url)
         cv = cv[~cv["var"].isin(["for", "in", "ucgid"])]
-        cv.sort_values(by="group", inplace=True)
+        cv = cv.sort_values(by="group")
         cv = cv[['var', 'group', 'concept',  'label', 'var_name', 'type',  'limit', 'attributes']]
         return cv
 
-    cv = pd.concat([load_meta(url) for url in urls])
+    cv = pd.concat([load_meta(url) for url in [details, subjects]])
     ct = cv[["group", "concept"]].drop_duplicates()
-    ct["is_table"] = ct.group.apply(lambda x: len(x) == 6)
-    ct = ct[ct.is_table]
-    ct.dropna(inplace=True)
-    ct.drop(columns=["is_table"], inplace=True)
+    ct = ct[ct.group.str.len() == 6]
+    ct = ct.dropna()
     ct = ct[ct.concept.notnull()]
     census_vars = cv
     census_tables = ct
@@ -61,7 +146,7 @@ def _init_vars():
 
 def merge_states(df):
     df["STATEFP"] = df.ucgid.str[-2:]
-    states = gpd.read_file( "https://www2.census.gov/geo/tiger/TIGER2022/STATE/tl_2022_us_state.zip")
+    states = cache.read("state", 2022)
     states = states[["STATEFP", "STUSPS", "geometry"]]
     data = states.merge(df, on="STATEFP")
     data.rename(columns={"NAME": "state_name", "STUSPS": "state", "STATEFP":"statefp"}, inplace=True)
@@ -72,14 +157,24 @@ def merge_states(df):
     return data
 
 
-def merge_counties(df):
-    land = gpd.read_file( "https://www2.census.gov/geo/tiger/GENZ2018/shp/cb_2018_us_state_500k.zip")
+def merge_counties(df, store=None):
+    """
+    Merge county level data with the TIGER/Line county boundaries.
+    If `store` is the path of a county GeoParquet store (see `tiger.write_parquet`),
+    only the states in `df` are read from it instead of the national file.
+    """
+    land = cache.read("state", 2018, resolution="500k")
     df["GEOID"] = df.ucgid.apply(lambda x: x.split("US")[1])
     df["state_name"] = df.NAME.apply(lambda x: x.split(",")[1].strip())
     df.drop(columns=["NAME"], inplace=True)
-    county_url = "https://www2.census.gov/geo/tiger/TIGER2022/COUNTY/tl_2022_us_county.zip"
-    counties = gpd.read_file(county_url)
-    counties = counties[["GEOID", "STATEFP", "COUNTYFP", "NAME", "geometry"]]
+    cols = ["GEOID", "STATEFP", "COUNTYFP", "NAME", "geometry"]
+    if store:
+        # imported here: tiger loads the map ui (IPython, matplotlib, folium...)
+        from . import tiger
+        counties = tiger.read_parquet(store, columns=cols, states=df.GEOID.str[:2].unique())
+    else:
+        counties = cache.read("county", 2022)
+    counties = counties[cols]
     data = counties.merge(df, on="GEOID")
     data.rename(columns={"NAME": "county", "COUNTYFP": "countyfp", "STATEFP": "statefp"}, inplace=True)
     data["state"] = data.statefp.apply(lookup_state)
@@ -91,30 +186,64 @@ def merge_counties(df):
     data = gpd.clip(data, land)
     return data
 
-def merge_tracts(df):
-    land = gpd.read_file("https://www2.census.gov/geo/tiger/GENZ2018/shp/cb_2018_us_state_500k.zip")
+def _read_tracts(statefp, store=None, year=2022):
+    cols = ["GEOID", "geometry", "STATEFP", "COUNTYFP", "TRACTCE"]
+    if store:
+        from . import tiger
+        return tiger.read_parquet(store, columns=cols, states=[statefp])[cols]
+    tracts = cache.read("tract", year, statefp)
+    return tracts[cols]
+
+
+def merge_tracts(df, max_workers=None, store=None):
+    """
+    Merge tract level data with the TIGER/Line tract boundaries
+    for every state in the data. Each state's tracts are read, merged
+    and clipped to its shoreline in a thread pool (shapely releases
+    the GIL while clipping).
+
+    Parameters:
+    -----------
+    df : DataFrame
+        Census data with a `ucgid` column at the tract level.
+    max_workers : int
+        The number of threads to use. Default is the number of CPUs.
+    store : str
+        The path of a tract GeoParquet store (see `tiger.write_parquet`).
+        If given, each state's tracts are read from it instead of being downloaded.
+
+    Returns:
+    --------
+    GeoDataFrame
+        The data for all states with lowercase column names
+        and the tract geometry.
+    """
+    max_workers = max_workers or os.cpu_count()
+
+    df = df.copy()
+    df["GEOID"] = df.ucgid.apply(lambda x: x.split("US")[1])
+    state_fips = df.GEOID.str[:2].unique()
+    # push geometry cols to the end
+    cols =  list(df.columns) + ["STATEFP", "COUNTYFP", "TRACTCE", "geometry"]
+    if len(state_fips) == 0:
+        return gpd.GeoDataFrame(columns=[c.lower() for c in cols], geometry="geometry", crs="EPSG:4269")
 
+    land = cache.read("state", 2018, resolution="500k")
 
-    df["GEOID"] = df.ucgid.apply(lambda x: x.split("US")[1])
-    state_fips = df.ucgid.apply(lambda x: x.split("US")[1][:2])
-    state_fips = state_fips.unique()
-    for statefp in state_fips:
-        
-        url = f"https://www2.census.gov/geo/tiger/TIGER2022/TRACT/tl_2022_{statefp}_tract.zip"
-        state = land[land.STATEFP == statefp]
-        
-        tracts = gpd.read_file(url)       
-        tracts = tracts[["GEOID", "geometry", "STATEFP", "COUNTYFP", "TRACTCE"]]
-        
-        data = tracts.merge(df, on="GEOID")
-        # push geometry cols to the end
-        cols =  list(df.columns) + ["STATEFP", "COUNTYFP", "TRACTCE", "geometry"]
+    def merge_state(statefp):
+        data = _read_tracts(statefp, store).merge(df, on="GEOID")
         data = data[cols]
         data.columns = [c.lower() for c in data.columns]
-        data = gpd.clip(data, state)
-    return data
+        return gpd.clip(data, land[land.STATEFP == statefp])
 
-def merge_geography(data):
+    with ThreadPoolExecutor(max_workers=max_workers) as threads:
+        results = list(threads.map(merge_state, state_fips))
+
+    data = pd.concat(results, ignore_index=True)
+    data = gpd.GeoDataFrame(data, geometry="geometry", crs=results[0].crs)
+    return data.sort_values(by="geoid").reset_index(drop=True)
+
+def merge_geography(data, store=None):
     data = data.copy()
     level_codes = {
         "010": "Nation",
@@ -166,85 +295,194 @@ def merge_geography(data):
         return data.sort_values(by="state")
     
     if level == "County":
-        data = merge_counties(data)
+        data = merge_counties(data, store=store)
         return data.sort_values(by=["state", "county"])
     
     if level == "Census Tract":
-        return merge_tracts(data)
+        return merge_tracts(data, store=store)
 
     warnings.warn(f"Unsupported geographic level: {level}, no geography available")
     return data
 
+# annotation values the Census API uses in place of an estimate
+# (e.g. -666666666: "estimate could not be computed"), read as missing
+SENTINELS = [-999999999, -888888888, -666666666, -555555555, -333333333, -222222222]
+
+GEO_VARS = ['AIANHH', 'ANRC', 'CBSA', 'CD', 'COUNTY', 'COUSUB', 'CSA',
+            'GEOCOMP', 'GEO_ID', 'METDIV', 'NAME', 'NATION',
+            'PLACE', 'PRINCITY', 'PUMA', 'REGION', 'SDELM',
+            'SDSEC', 'SDUNI', 'STATE', 'SUMLEVEL', 'UA',
+            'block group', 'congressional district', 'county', 'for', 'in',
+            'place', 'state', 'tract', 'ucgid', 'zcta']
+
+
+def _int_dtype(lo, hi, nullable):
+    for dtype in ["int8", "int16", "int32", "int64"]:
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return dtype.capitalize() if nullable else dtype
+    return "Float64" if nullable else "float64"
+
+
+def to_numeric(data, types=None):
+    """
+    Convert the columns of `data` to numbers in one pass.
+    Census sentinel values (see `SENTINELS`) become missing and each
+    column is downcast to the smallest dtype that holds it exactly:
+    whole numbers use the smallest (nullable, if any values are missing)
+    integer type, other columns use float32 if it is lossless, else float64.
+
+    Parameters:
+    -----------
+    data : DataFrame
+        The columns to convert, usually strings from the Census API.
+    types : Series
+        The catalog `predicateType` of each column ("int" or "float").
+        Columns typed "float" are never converted to integers.
+
+    Returns:
+    --------
+    DataFrame
+        The converted columns.
+    """
+    if data.shape[1] == 0:
+        return data.copy()
+    values = pd.to_numeric(pd.Series(data.to_numpy().ravel()), errors="coerce")
+    values = values.to_numpy(dtype="float64").reshape(data.shape)
+    values[np.isin(values, SENTINELS)] = np.nan
+
+    missing = np.isnan(values)
+    has_na = missing.any(axis=0)
+    all_na = missing.all(axis=0)
+    filled = np.where(missing, 0, values)
+    whole = (filled == np.round(filled)).all(axis=0) & ~all_na
+    if types is not None:
+        whole &= (types.reindex(data.columns).to_numpy() != "float")
+    lo = filled.min(axis=0, initial=0)
+    hi = filled.max(axis=0, initial=0)
+
+    dtypes = {}
+    for i, col in enumerate(data.columns):
+        if whole[i]:
+            dtypes[col] = _int_dtype(lo[i], hi[i], has_na[i])
+        elif np.array_equal(values[:, i].astype("float32").astype("float64"), values[:, i], equal_nan=True):
+            dtypes[col] = "float32"
+        else:
+            dtypes[col] = "float64"
+
+    result = pd.DataFrame(values, index=data.index, columns=data.columns)
+    by_dtype = pd.Series(dtypes)
+    parts = [result[cols].astype(dtype) for dtype, cols in by_dtype.groupby(by_dtype).groups.items()]
+    return pd.concat(parts, axis=1)[data.columns]
+
+
 def merge_meta(data, meta):
-    data = data.copy()
-    geo_vars = ['AIANHH', 'ANRC', 'CBSA', 'CD', 'COUNTY', 'COUSUB', 'CSA',
-                'GEOCOMP', 'GEO_ID', 'METDIV', 'NAME', 'NATION',
-                'PLACE', 'PRINCITY', 'PUMA', 'REGION', 'SDELM',
-                'SDSEC', 'SDUNI', 'STATE', 'SUMLEVEL', 'UA',
-                'block group', 'congressional district', 'county', 'for', 'in',
-                'place', 'state', 'tract', 'ucgid', 'zcta']
-    
-    metadata = requests.get(meta).json()
-    vars_url = metadata["dataset"][0]["c_variablesLink"]
-    vars = requests.get(vars_url).json()
-    vars = vars["variables"]
-
-    aliases = {}
-    for c in data.columns:
-        meta = vars.get(c, None)
-        predicate = meta.get("predicateOnly", False) if meta is not None else False
-        if c in geo_vars or predicate:
-            aliases[c] = c
-            continue
-        
-        if meta is None:
-            # if not c.startswith("D"):
-            #     print(f"{c},")
-            continue
-
-        # try to convert to the correct type
-        t = meta.get("predicateType", None)
-        try:
-            if t in ["int", "float"]:
-                i = data[c].astype(float)
-                try:
-                    i = i.astype(int)
-                except:
-                    pass
-                data[c] = i
-        except:
-            print(f"Error converting {c} to {t}. Value ({data[c]})")
-        
-        n = nice_name(meta["label"])
-        aliases[c] = n
-
-    # print(aliases)
-    aliases = de_dup(aliases)
-    data = data[aliases.keys()]
-    data.rename(columns=aliases, inplace=True)
+    """
+    Convert the columns of Census API data to numbers (see `to_numeric`)
+    and rename them to the nice names of their labels in the variable catalog.
+    Geography columns keep their names and columns that aren't in
+    the catalog are dropped.
+    """
+    cv = catalog(meta).set_index("var")
+    cv = cv[~cv.index.duplicated()]
+    known = cv.reindex(data.columns)
+
+    predicate = known.predicateOnly.fillna(False).astype(bool).to_numpy()
+    is_geo = data.columns.isin(GEO_VARS) | predicate
+    keep = is_geo | known.var_name.notna().to_numpy()
+    numeric = ~is_geo & known.type.isin(["int", "float"]).to_numpy()
+
+    numeric_cols = data.columns[numeric]
+    converted = to_numeric(data[numeric_cols], known.type[numeric])
+    data = pd.concat([data.loc[:, ~numeric], converted], axis=1)
+
+    cols = known.index[keep]
+    aliases = pd.Series(np.where(is_geo, known.index, known.var_name), index=known.index)[keep]
+    aliases = de_dup(aliases.to_dict())
+    data = data[cols]
+    data.columns = [aliases[c] for c in cols]
     duplicates = data.columns[data.columns.duplicated()]
     assert len(duplicates) == 0, f"Duplicate columns:\n {duplicates}"
     return data
 
 def de_dup(aliases):
-    rev = {v:k for k, v in aliases.items()}
-    new_aliases = {}
-    for var, label in aliases.items():
-        if label in rev and rev[label] != var:
-            label = f"{label}_(var)"
-        new_aliases[var] = label
-    
-    return new_aliases
+    labels = pd.Series(aliases, dtype=object)
+    # every var but the last one with a label gets a suffix
+    dups = labels.duplicated(keep="last")
+    labels[dups] = labels[dups] + "_(var)"
+    return labels.to_dict()
 
 
-def get(api, meta, raw=False):
+def get(api, meta, raw=False, store=None):
     json = requests.get(api).json()
     data = pd.DataFrame(json[1:], columns=json[0])
     if raw:
         return data
     data = merge_meta(data, meta)
 
-    data = merge_geography(data)
+    data = merge_geography(data, store=store)
+    return data.copy()
+
+
+def get_batch(dataset, variables, ucgid, key=None, chunk_size=MAX_VARIABLES - 1,
+              max_workers=8, raw=False, store=None):
+    """
+    Get any number of variables for a set of geographies.
+    The Census API limits the number of variables in a request,
+    so the variables are split into chunks that are requested
+    concurrently over a pooled session (with retries) and
+    joined on `ucgid`. Metadata is merged once for the whole result.
+
+    Parameters:
+    -----------
+    dataset : str
+        The dataset url, e.g. "https://api.census.gov/data/2022/acs/acs5/profile"
+    variables : list of str
+        The variables to get, e.g. ["DP05_0001E", "DP05_0002E", ...]
+    ucgid : str
+        The geographies, e.g. "pseudo(0100000US$0500000)" for every county.
+    key : str
+        Census API key. Default is no key.
+    chunk_size : int
+        The number of variables per request. Default is the API limit (NAME is added to the first chunk).
+    max_workers : int
+        The number of concurrent requests.
+    raw : bool
+        If `True` return the joined data without metadata or geography.
+    store : str
+        A GeoParquet store for the boundaries (see `merge_geography`).
+
+    Returns:
+    --------
+    DataFrame or GeoDataFrame
+    """
+    variables = [v for v in dict.fromkeys(variables) if v not in ["NAME", "ucgid"]]
+    chunks = [variables[i:i + chunk_size] for i in range(0, len(variables), chunk_size)] or [[]]
+    chunks[0] = ["NAME"] + chunks[0]
+
+    session = download.make_session(pool_size=max_workers)
+
+    def fetch(chunk):
+        params = {"get": ",".join(chunk), "ucgid": ucgid}
+        if key:
+            params["key"] = key
+        response = session.get(dataset, params=params, timeout=120)
+        response.raise_for_status()
+        json = response.json()
+        return pd.DataFrame(json[1:], columns=json[0]).set_index("ucgid")
+
+    results, failures = download.fetch_all(chunks, fetch, max_workers=max_workers)
+    if failures:
+        raise failures[0]["error"]
+
+    data = pd.concat(results, axis=1)
+    data = data.loc[:, ~data.columns.duplicated()]
+    data = data[["NAME"] + variables].reset_index()
+    if raw:
+        return data
+
+    data = merge_meta(data, dataset)
+    data = merge_geography(data, store=store)
     return data.copy()
 
 
@@ -285,13 +523,9 @@ def col_name(var):
 
 def rename_columns(data, year=2023):
 
-    url = f"http://api.census.gov/data/{year}/acs/acs1/subject/variables.json"
-    resp = requests.get(url)
-    json = resp.json()
+    df = catalog(variables_url(year, "acs/acs1", "subject")).set_index("var")
 
-    df = pd.DataFrame(json['variables']).T
-
-    df["var_name"] = df.label.apply(col_name)
+    df["var_name"] = df["col_name"]
     df.var_name = df.var_name.str.replace("total_households_", "")
     df.var_name = df.var_name.str.replace("percent_total_households_", "")
     col_map = df["var_name"].to_dict()
@@ -326,18 +560,112 @@ def get_tables():
 
 
 
-def search(term, results=20):
-    tables = get_tables()
-    tables = tables[tables.concept.notnull()]
-    vectorizer = TfidfVectorizer()
-    tfidf_matrix = vectorizer.fit_transform(tables.concept)
-
-    query_vec = vectorizer.transform([term])
-    tables["match"] = cosine_similarity(query_vec, tfidf_matrix).flatten()
-    tables.sort_values(by='match', ascending=False, inplace=True)
-    tables = tables.head(results).copy()
-    results = tables.style.set_properties(subset=['concept'], **{'white-space': 'pre-wrap', 'word-wrap': 'break-word'})
-    results.format({'match': '{:.2%}', 'concept': lambda x: x.title()})
+def _search_docs(on):
+    if on == "concept":
+        docs = get_tables()
+        return docs[docs.concept.notnull()].reset_index(drop=True), "concept"
+    if on == "label":
+        docs = get_variables()[["var", "group", "concept", "label"]]
+        docs = docs[docs.label.notnull()].reset_index(drop=True)
+        docs["text"] = docs.label.str.replace("!!", " ", regex=False) + " " + docs.concept.fillna("")
+        return docs, "text"
+    raise ValueError(f"Can't search on {on}, use 'concept' or 'label'")
+
+
+def _mtimes(paths):
+    """The modification times of some files, `None` for the missing ones."""
+    return [os.path.getmtime(path) if os.path.exists(path) else None for path in paths]
+
+
+def search_index(on="concept", refresh=False):
+    """
+    Get the TF-IDF search index for table concepts (`on="concept"`)
+    or variable labels (`on="label"`). The index is fit once per
+    version of the variable catalog and saved with its vocabulary
+    next to the catalog cache, so later processes just load it.
+
+    Returns:
+    --------
+    dict
+        `docs` (the DataFrame of searchable rows), `vectorizer`
+        (the fitted `TfidfVectorizer`) and `matrix` (the sparse,
+        L2 normalized TF-IDF matrix, one row per doc).
+    """
+    if on in _search_indexes and not refresh:
+        return _search_indexes[on]
+
+    sources = [_catalog_path(variables_url(2022, "acs/acs5")),
+               _catalog_path(variables_url(2022, "acs/acs5", "subject"))]
+    path = os.path.join(cache.cache_dir("catalog", f"v{CATALOG_VERSION}", "search"), f"{on}.pkl")
+
+    index = None
+    if os.path.exists(path) and not refresh:
+        with open(path, "rb") as f:
+            index = pickle.load(f)
+        # rebuild if a catalog was downloaded again since the index was fit
+        if index["mtimes"] != _mtimes(sources):
+            index = None
+
+    if index is None:
+        docs, text = _search_docs(on)
+        vectorizer = TfidfVectorizer()
+        matrix = vectorizer.fit_transform(docs[text]).tocsr()
+        docs = docs.drop(columns=["text"], errors="ignore")
+        index = {
+            "docs": docs,
+            "vectorizer": vectorizer,
+            "matrix": matrix,
+            "mtimes": _mtimes(sources),
+        }
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".pkl")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    _search_indexes[on] = index
+    return index
+
+
+def lookup(term, results=20, on="concept"):
+    """
+    Find the tables (or variables) that best match `term`.
+    Only docs sharing a word with the query are scored, and
+    the top `results` are selected without sorting every score.
+
+    Parameters:
+    -----------
+    term : str
+        The search text.
+    results : int
+        The number of matches to return.
+    on : str
+        "concept" to search table concepts, "label" to search variable labels.
+
+    Returns:
+    --------
+    DataFrame
+        The matching rows with a `match` column (cosine similarity), best first.
+    """
+    index = search_index(on)
+    query = index["vectorizer"].transform([term])
+    # rows are L2 normalized, so the dot product is the cosine similarity
+    scores = (index["matrix"] @ query.T).tocoo()
+    rows, match = scores.row, scores.data
+    if len(match) > results:
+        top = np.argpartition(-match, results)[:results]
+        rows, match = rows[top], match[top]
+    order = np.argsort(-match, kind="stable")
+
+    found = index["docs"].iloc[rows[order]].copy()
+    found["match"] = match[order]
+    return found
+
+
+def search(term, results=20, on="concept"):
+    tables = lookup(term, results, on)
+    col = "concept" if on == "concept" else "label"
+    results = tables.style.set_properties(subset=[col], **{'white-space': 'pre-wrap', 'word-wrap': 'break-word'})
+    results.format({'match': '{:.2%}', 'concept': lambda x: x.title() if isinstance(x, str) else x})
     return results
 
 
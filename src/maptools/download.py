@@ -0,0 +1,257 @@
+import os
+import json
+import time
+import random
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# HTTP status codes worth retrying: rate limited or a transient server error
+RETRY_STATUS = [429, 500, 502, 503, 504]
+
+
+def make_session(pool_size=8):
+    """
+    Create a `requests.Session` with a connection pool of `pool_size`
+    connections per host, so that many threads can share it without
+    opening (and throwing away) a new connection for every request.
+
+    Parameters:
+    -----------
+    pool_size : int
+        The number of connections to keep open to each host.
+
+    Returns:
+    --------
+    requests.Session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def rate_limiter(rate=None):
+    """
+    Create a function that blocks until the next request may start,
+    allowing at most `rate` requests per second across all threads.
+
+    Parameters:
+    -----------
+    rate : float
+        Requests per second. If `None` the returned function never waits.
+
+    Returns:
+    --------
+    function
+        Call it before each request.
+    """
+    lock = threading.Lock()
+    interval = 1 / rate if rate else 0
+    next_slot = [time.monotonic()]
+
+    def wait():
+        if not interval:
+            return
+        with lock:
+            now = time.monotonic()
+            start = max(now, next_slot[0])
+            next_slot[0] = start + interval
+        time.sleep(start - now)
+
+    return wait
+
+
+def is_transient(e):
+    """Check if an exception from `requests` is worth retrying."""
+    if isinstance(e, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(e, requests.HTTPError) and e.response is not None:
+        return e.response.status_code in RETRY_STATUS
+    return False
+
+
+def retry(func, *args, retries=5, backoff=1.0, max_backoff=60, wait=None, transient=is_transient, **kwargs):
+    """
+    Call `func(*args, **kwargs)`, retrying transient errors
+    with exponential backoff and full jitter: attempt `n` sleeps a
+    random time between 0 and `backoff * 2**n` seconds (at most `max_backoff`).
+
+    Parameters:
+    -----------
+    func : callable
+        The function to call.
+    retries : int
+        The number of times to retry after the first attempt.
+    backoff : float
+        The base delay in seconds.
+    max_backoff : float
+        The longest delay between attempts.
+    wait : callable
+        Called before every attempt, e.g. a `rate_limiter`.
+    transient : callable
+        Returns `True` if an exception is worth retrying. Default is `is_transient`.
+
+    Returns:
+    --------
+    The result of `func`. The last exception is raised if every attempt fails.
+    """
+    attempt = 0
+    while True:
+        if wait:
+            wait()
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt >= retries or not transient(e):
+                raise
+            delay = min(max_backoff, backoff * 2 ** attempt)
+            time.sleep(random.uniform(0, delay))
+            attempt += 1
+
+
+def fetch_all(items, func, max_workers=8, retries=5, backoff=1.0, rate=None, progress=None,
+              transient=is_transient):
+    """
+    Run `func(item)` for every item in a bounded thread pool.
+    Each call is rate limited and retried (see `retry`), and a
+    failure doesn't stop the other downloads.
+
+    Parameters:
+    -----------
+    items : list
+        The items to process, usually urls.
+    func : callable
+        The function to call with each item.
+    max_workers : int
+        The number of concurrent calls.
+    retries : int
+        The number of retries for transient errors.
+    backoff : float
+        The base delay, in seconds, between retries.
+    rate : float
+        The maximum number of calls started per second. Default is no limit.
+    progress : callable
+        Called as `progress(done, total, item, error)` after each item finishes;
+        `error` is `None` on success.
+    transient : callable
+        Returns `True` if an exception is worth retrying. Default is `is_transient`.
+
+    Returns:
+    --------
+    tuple of (list, list)
+        The results of the successful calls, and a failure report:
+        a list of dicts with the `item` and the `error` that stopped it.
+    """
+    wait = rate_limiter(rate)
+    results = []
+    failures = []
+    total = len(items)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(retry, func, item, retries=retries, backoff=backoff,
+                                   wait=wait, transient=transient): item
+                   for item in items}
+        for done, future in enumerate(as_completed(futures), start=1):
+            item = futures[future]
+            error = future.exception()
+            if error is None:
+                results.append(future.result())
+            else:
+                failures.append({"item": item, "error": error})
+            if progress:
+                progress(done, total, item, error)
+    return results, failures
+
+
+def remote_info(session, url):
+    """
+    Get the size and modification time of a remote file with a HEAD request.
+
+    Returns:
+    --------
+    dict
+        `size` (int or `None`), `last_modified` and `etag` (str or `None`).
+    """
+    response = session.head(url, allow_redirects=True, timeout=60)
+    response.raise_for_status()
+    size = response.headers.get("Content-Length")
+    return {
+        "size": int(size) if size is not None else None,
+        "last_modified": response.headers.get("Last-Modified"),
+        "etag": response.headers.get("ETag"),
+    }
+
+
+def _read_validator(path):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def resume_download(session, url, filename, info=None, chunk_size=1024 * 1024):
+    """
+    Download `url` to `filename`, resuming a partial download.
+    Data is written to `filename.part` and moved into place when complete.
+    The ETag / Last-Modified of the response that started the `.part`
+    file are kept next to it in `filename.part.json`. If a `.part` file
+    is left from an earlier attempt only the missing bytes are requested
+    with an HTTP Range request; `If-Range` with the stored validator makes
+    the server send the whole file instead if it changed in the meantime.
+    A `.part` file without a stored validator is discarded.
+
+    Parameters:
+    -----------
+    session : requests.Session
+        The session to use.
+    url : str
+        The url to download.
+    filename : str
+        The local path to save to.
+    info : dict
+        The `remote_info` of the url, used to check the download is complete.
+
+    Returns:
+    --------
+    str
+        The filename.
+    """
+    info = info or {}
+    size = info.get("size")
+    part = filename + ".part"
+    sidecar = part + ".json"
+    have = os.path.getsize(part) if os.path.exists(part) else 0
+    stored = _read_validator(sidecar) if have else None
+    validator = stored and (stored.get("etag") or stored.get("last_modified"))
+    if not validator or (size is not None and have > size):
+        have = 0
+
+    if size is None or have < size or not os.path.exists(part):
+        headers = {}
+        if have:
+            headers["Range"] = f"bytes={have}-"
+            headers["If-Range"] = validator
+        with session.get(url, headers=headers, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            if response.status_code == 206:
+                mode = "ab"
+            else:
+                mode = "wb"
+                with open(sidecar, "w") as f:
+                    json.dump({"etag": response.headers.get("ETag"),
+                               "last_modified": response.headers.get("Last-Modified")}, f)
+            with open(part, mode) as file:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    if chunk:
+                        file.write(chunk)
+
+    if size is not None and os.path.getsize(part) != size:
+        # treated as a transient error so `retry` resumes from here
+        raise requests.ConnectionError(f"Incomplete download of {url}")
+    os.replace(part, filename)
+    if os.path.exists(sidecar):
+        os.remove(sidecar)
+    return filename
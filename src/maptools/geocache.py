@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+from . import cache
+
+# seconds before a failed lookup is sent to the geocoder again
+MISS_TTL = 30 * 24 * 60 * 60
+
+_local = threading.local()
+
+
+def cache_path():
+    """The default location of the geocode cache database."""
+    return os.path.join(cache.cache_dir(), "geocode.sqlite")
+
+
+def connect(path=None):
+    """
+    Open the geocode cache database, creating it if needed.
+    Connections are kept per process, thread and path, so a forked
+    worker never reuses a connection opened by its parent. The database
+    uses WAL journaling and a busy timeout, so several worker processes
+    can read and write it at once.
+
+    Parameters:
+    -----------
+    path : str
+        The database file. Default is `cache_path()`.
+
+    Returns:
+    --------
+    sqlite3.Connection
+    """
+    path = path or cache_path()
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    key = (os.getpid(), path)
+    if key in connections:
+        return connections[key]
+
+    conn = sqlite3.connect(path, timeout=60)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS geocode (
+            key TEXT PRIMARY KEY,
+            lookup TEXT,
+            viewbox TEXT,
+            found INTEGER,
+            lat REAL,
+            lon REAL,
+            payload TEXT,
+            created REAL
+        )""")
+    conn.commit()
+    connections[key] = conn
+    return conn
+
+
+def cache_key(lookup, viewbox=None):
+    """The cache key for a `parse_address` lookup string and viewbox."""
+    box = json.dumps(viewbox, default=str) if viewbox else ""
+    return f"{lookup.strip().upper()}|{box}"
+
+
+def get_many(keys, path=None, miss_ttl=MISS_TTL):
+    """
+    Look up cached geocode results.
+
+    Parameters:
+    -----------
+    keys : list of str
+        Keys from `cache_key`.
+    path : str
+        The database file. Default is `cache_path()`.
+    miss_ttl : int
+        Seconds a cached miss is trusted. Older misses are treated as not cached.
+
+    Returns:
+    --------
+    dict
+        key -> dict with `found` (bool), `lat`, `lon` and `payload` (the raw geocoder result),
+        for the keys that are cached.
+    """
+    conn = connect(path)
+    oldest_miss = time.time() - miss_ttl
+    results = {}
+    keys = list(keys)
+    # stay under sqlite's limit on query parameters
+    for i in range(0, len(keys), 500):
+        chunk = keys[i:i + 500]
+        marks = ",".join("?" * len(chunk))
+        rows = conn.execute(
+            f"SELECT key, found, lat, lon, payload, created FROM geocode WHERE key IN ({marks})", chunk)
+        for key, found, lat, lon, payload, created in rows:
+            if not found and created < oldest_miss:
+                continue
+            results[key] = {
+                "found": bool(found),
+                "lat": lat,
+                "lon": lon,
+                "payload": json.loads(payload) if payload else None,
+            }
+    return results
+
+
+def put_many(rows, path=None):
+    """
+    Store geocode results.
+
+    Parameters:
+    -----------
+    rows : list of dict
+        Each with `key`, `lookup`, `viewbox`, and `location`
+        (a geopy `Location`, or `None` to record a miss).
+    path : str
+        The database file. Default is `cache_path()`.
+    """
+    now = time.time()
+    values = []
+    for row in rows:
+        loc = row["location"]
+        viewbox = json.dumps(row.get("viewbox"), default=str) if row.get("viewbox") else None
+        if loc:
+            values.append((row["key"], row["lookup"], viewbox, 1, loc.latitude, loc.longitude,
+                           json.dumps(getattr(loc, "raw", None)), now))
+        else:
+            values.append((row["key"], row["lookup"], viewbox, 0, None, None, None, now))
+    conn = connect(path)
+    with conn:
+        conn.executemany("INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?, ?, ?, ?, ?)", values)
+
+
+def purge(path=None, miss_ttl=MISS_TTL):
+    """Delete expired misses from the cache. Returns the number of rows removed."""
+    conn = connect(path)
+    with conn:
+        cursor = conn.execute("DELETE FROM geocode WHERE found = 0 AND created < ?",
+                              (time.time() - miss_ttl,))
+    return cursor.rowcount
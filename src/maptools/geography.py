@@ -0,0 +1,146 @@
+import os
+import tempfile
+import warnings
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import requests
+
+from . import cache
+
+# census geography level -> whether TIGER/Line publishes it as one national file
+# (the other levels have one file per state)
+LEVELS = {
+    "state": True,
+    "county": True,
+    "cousub": False,
+    "place": False,
+    "tract": False,
+    "bg": False,
+}
+
+# boundary files (with their spatial index) kept in memory between queries
+INDEX_CACHE_SIZE = 8
+
+
+def boundaries_path(level, vintage=2023, statefp=None):
+    """The location of the GeoParquet copy of a boundary file in the maptools cache."""
+    return os.path.join(cache.cache_dir("geography", str(vintage), level), f"{statefp or 'us'}.parquet")
+
+
+def load_boundaries(level, vintage=2023, statefp=None):
+    """
+    Load the GEOID and geometry of a TIGER/Line boundary file.
+    The shapefile is downloaded through the boundary cache the first
+    time and kept as GeoParquet, which is much faster to read again.
+
+    Parameters:
+    -----------
+    level : str
+        One of `LEVELS`, e.g. "tract".
+    vintage : int
+        The TIGER/Line year.
+    statefp : str
+        The state FIPS code, for levels published per state.
+
+    Returns:
+    --------
+    GeoDataFrame
+    """
+    path = boundaries_path(level, vintage, statefp)
+    if os.path.exists(path):
+        return gpd.read_parquet(path)
+
+    gdf = cache.read(level, vintage, statefp, columns=["GEOID"])
+    gdf = gdf[["GEOID", "geometry"]].sort_values("GEOID", ignore_index=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".parquet")
+    os.close(fd)
+    gdf.to_parquet(tmp)
+    os.replace(tmp, path)
+    return gdf
+
+
+@lru_cache(maxsize=INDEX_CACHE_SIZE)
+def _indexed(level, vintage, statefp):
+    """The boundaries with their spatial index (an STRtree) built, kept for the next query."""
+    gdf = load_boundaries(level, vintage, statefp)
+    gdf.sindex  # builds the tree
+    return gdf
+
+
+def _lookup(level, vintage, statefp, geoms):
+    """The GEOID of the `level` polygon containing each point, or `None`."""
+    gdf = _indexed(level, vintage, statefp)
+    # bounding box query on the tree, then the exact test on the candidates only
+    point_idx, poly_idx = gdf.sindex.query(geoms, predicate="intersects")
+    # a point on a shared border is given to the first polygon
+    points, first = np.unique(point_idx, return_index=True)
+    geoids = np.full(len(geoms), None, dtype=object)
+    geoids[points] = gdf.GEOID.to_numpy()[poly_idx[first]]
+    return geoids
+
+
+def assign_geographies(points, levels=("county", "tract"), vintage=2023, geometry="geometry"):
+    """
+    Add the census geography codes (GEOID) of the polygons that contain each point.
+
+    Points are first matched to states with the national state file,
+    then each state is processed in turn, so the tracts (or block
+    groups, places, ...) of the whole country are never loaded at once.
+    Boundaries are cached as GeoParquet and their spatial indexes are
+    built on first use; the `INDEX_CACHE_SIZE` most recently used
+    boundary files stay in memory for later calls.
+
+    Parameters:
+    -----------
+    points : GeoDataFrame
+        The points, e.g. the result of `address.geocode`. Missing geometries are allowed.
+    levels : list of str
+        The geographies to assign, from `LEVELS`.
+    vintage : int
+        The TIGER/Line year of the boundaries.
+    geometry : str
+        The name of the geometry column.
+
+    Returns:
+    --------
+    GeoDataFrame
+        A copy of `points` with a `<level>_geoid` column for each level
+        (and "state_geoid") holding the GEOID, or `NA` if the point isn't
+        in any polygon.
+    """
+    unknown = [level for level in levels if level not in LEVELS]
+    if unknown:
+        raise ValueError(f"Unknown geography levels {unknown}, use one of {list(LEVELS)}")
+    taken = [f"{level}_geoid" for level in ["state", *levels] if f"{level}_geoid" in points.columns]
+    if taken:
+        raise ValueError(f"points already has the columns {taken}")
+
+    states = _indexed("state", vintage, None)
+    geoms = points[geometry]
+    if geoms.crs is None:
+        geoms = geoms.set_crs("EPSG:4326")
+    geoms = geoms.to_crs(states.crs).reset_index(drop=True)
+
+    codes = {"state": _lookup("state", vintage, None, geoms)}
+    for level in levels:
+        if level != "state" and LEVELS[level]:
+            codes[level] = _lookup(level, vintage, None, geoms)
+
+    by_state = [level for level in levels if not LEVELS[level]]
+    for level in by_state:
+        codes[level] = np.full(len(geoms), None, dtype=object)
+    if by_state:
+        state_codes = pd.Series(codes["state"])
+        for statefp, rows in state_codes.groupby(state_codes, sort=True).indices.items():
+            for level in by_state:
+                try:
+                    codes[level][rows] = _lookup(level, vintage, statefp, geoms.iloc[rows])
+                except requests.HTTPError as e:
+                    warnings.warn(f"No {level} boundaries for state {statefp}: {e}")
+
+    result = points.copy()
+    for level, values in codes.items():
+        result[f"{level}_geoid"] = pd.array(values, dtype="string")
+    return result
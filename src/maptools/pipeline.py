@@ -0,0 +1,221 @@
+import os
+import json
+import tempfile
+import pandas as pd
+import geopandas as gpd
+import pyarrow.parquet as pq
+
+from . import address
+from . import streets
+from . import geography
+from . import validate
+
+CHECKPOINT = "_checkpoint.json"
+
+
+def read_chunks(path, chunk_size=100_000, columns=None, skip=0):
+    """
+    Read a CSV or Parquet file `chunk_size` rows at a time.
+
+    Parameters:
+    -----------
+    path : str
+        The file to read. Files ending in .parquet are read as Parquet, others as CSV.
+    chunk_size : int
+        The number of rows in each chunk.
+    columns : list of str
+        Only read these columns.
+    skip : int
+        Start after this many rows. Parquet row groups before it aren't read
+        at all, and CSV lines before it are skipped without being parsed.
+
+    Returns:
+    --------
+    generator of DataFrame
+    """
+    if path.endswith(".parquet"):
+        file = pq.ParquetFile(path)
+        meta = file.metadata
+        first = 0
+        while first < meta.num_row_groups and skip >= meta.row_group(first).num_rows:
+            skip -= meta.row_group(first).num_rows
+            first += 1
+        if first == meta.num_row_groups:
+            return
+        row_groups = list(range(first, meta.num_row_groups))
+        for batch in file.iter_batches(batch_size=chunk_size, columns=columns, row_groups=row_groups):
+            if skip:
+                dropped = min(skip, batch.num_rows)
+                batch = batch.slice(dropped)
+                skip -= dropped
+                if not batch.num_rows:
+                    continue
+            yield batch.to_pandas()
+    else:
+        skiprows = range(1, skip + 1) if skip else None
+        for chunk in pd.read_csv(path, chunksize=chunk_size, usecols=columns, dtype=str, skiprows=skiprows):
+            # skipping every row still yields one empty chunk
+            if len(chunk):
+                yield chunk
+
+
+def load_checkpoint(out_dir):
+    """The progress of an earlier run writing to `out_dir`, or `None`."""
+    try:
+        with open(os.path.join(out_dir, CHECKPOINT), "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _save_checkpoint(out_dir, checkpoint):
+    fd, tmp = tempfile.mkstemp(dir=out_dir, prefix="_", suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump(checkpoint, f, indent=1)
+    os.replace(tmp, os.path.join(out_dir, CHECKPOINT))
+
+
+def geocode_chunk(df, addr_field="address", index=None, geocoder=None, levels=None,
+                  known=None, min_score=None, **kwargs):
+    """
+    Geocode one chunk of addresses and assign census geographies.
+
+    With a `min_score` the addresses are checked first (see `validate.validate`):
+    misspelled streets are corrected and addresses scoring below `min_score`
+    get the status "invalid" without being sent to a geocoder.
+
+    Addresses are geocoded offline with `streets.geocode` if an `index`
+    is given, and the ones it can't place are sent to the `geocoder`
+    (see `address.geocode`, extra keyword arguments are passed to it).
+    Both only look up each distinct address once.
+
+    Parameters:
+    -----------
+    df : DataFrame
+        The addresses.
+    addr_field : str
+        The column name of the address field.
+    index : GeoDataFrame
+        The address range index from `streets.load_index`.
+    geocoder : geopy.geocoders
+        A geocoder for the addresses the index can't place.
+    levels : list of str
+        The geographies to assign (see `geography.assign_geographies`).
+    known : dict
+        The known streets used to correct street names, from `validate.street_index`.
+    min_score : int
+        Skip addresses with a lower quality score. Default is to geocode every address.
+
+    Returns:
+    --------
+    GeoDataFrame
+    """
+    if index is None and geocoder is None:
+        raise ValueError("Pass an address range index, a geocoder, or both")
+
+    original = df
+    if min_score is not None:
+        checked = validate.validate(df[addr_field], known, min_score=min_score)
+        valid = checked.valid.to_numpy(dtype=bool)
+        df = df.assign(**{addr_field: checked.lookup.where(valid)})
+
+    if index is not None:
+        result = streets.geocode(df, index, addr_field=addr_field).to_crs("EPSG:4326")
+        todo = (result.status != "ok").to_numpy(dtype=bool)
+        if geocoder is not None and todo.any():
+            retried = address.geocode(df[todo], geocoder, addr_field=addr_field, **kwargs)
+            result = pd.concat([result[~todo], retried]).loc[df.index]
+            result = gpd.GeoDataFrame(result, geometry="geometry", crs="EPSG:4326")
+    else:
+        result = address.geocode(df, geocoder, addr_field=addr_field, **kwargs)
+
+    if min_score is not None:
+        result[addr_field] = original[addr_field]
+        result["score"] = checked.score
+        result.loc[~valid, "status"] = "invalid"
+
+    if levels:
+        result = geography.assign_geographies(result, levels)
+    return result
+
+
+def run(path, out_dir, addr_field="address", index=None, geocoder=None, levels=("county", "tract"),
+        chunk_size=100_000, columns=None, progress=None, known=None, min_score=None, **kwargs):
+    """
+    Geocode a CSV or Parquet file too large to load at once.
+
+    The file is read `chunk_size` rows at a time and each chunk is
+    parsed, deduplicated, geocoded and assigned to census geographies
+    (see `geocode_chunk`), then written to `out_dir` as its own
+    GeoParquet file (part-00000.parquet, part-00001.parquet, ...), so
+    memory use depends on the chunk size, not the file size.
+
+    After every chunk the progress is saved in `out_dir`; running again
+    with the same arguments starts reading after the rows already written
+    (see `read_chunks`). Use the geocode cache (`cache=True`, see
+    `address.geocode`) so addresses repeated across chunks aren't sent
+    to the geocoder again.
+
+    Parameters:
+    -----------
+    path : str
+        The input file.
+    out_dir : str
+        The directory for the output files, readable with `geopandas.read_parquet(out_dir)`.
+    addr_field : str
+        The column name of the address field.
+    index : GeoDataFrame
+        The address range index for offline geocoding (see `streets.load_index`).
+    geocoder : geopy.geocoders
+        A geocoder for the addresses the index can't place.
+    levels : list of str
+        The geographies to assign, or `None` for none.
+    chunk_size : int
+        The number of rows per chunk.
+    columns : list of str
+        Only read (and write) these columns.
+    progress : callable
+        Called as `progress(chunk, rows)` after each chunk is written,
+        with the chunk number and the total rows written.
+    known : dict
+        The known streets used to correct street names (see `geocode_chunk`).
+    min_score : int
+        Don't geocode addresses with a lower quality score (see `geocode_chunk`).
+
+    Returns:
+    --------
+    dict
+        The checkpoint: the number of chunks and rows written, the input rows
+        read, and a count of each status.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    checkpoint = load_checkpoint(out_dir)
+    if checkpoint and (checkpoint["input"] != os.path.abspath(path) or checkpoint["chunk_size"] != chunk_size):
+        raise ValueError(f"{out_dir} has output from another input or chunk size, use a new directory")
+    if not checkpoint:
+        checkpoint = {"input": os.path.abspath(path), "chunk_size": chunk_size,
+                      "chunks": 0, "rows": 0, "read": 0, "status": {}}
+    # checkpoints from before "read" was recorded wrote one row per input row
+    checkpoint.setdefault("read", checkpoint["rows"])
+
+    chunks = read_chunks(path, chunk_size, columns, skip=checkpoint["read"])
+    for n, chunk in enumerate(chunks, start=checkpoint["chunks"]):
+        result = geocode_chunk(chunk, addr_field, index=index, geocoder=geocoder, levels=levels,
+                               known=known, min_score=min_score, **kwargs)
+
+        part = os.path.join(out_dir, f"part-{n:05d}.parquet")
+        fd, tmp = tempfile.mkstemp(dir=out_dir, prefix="_", suffix=".tmp")
+        os.close(fd)
+        result.to_parquet(tmp, index=False)
+        os.replace(tmp, part)
+
+        checkpoint["chunks"] = n + 1
+        checkpoint["rows"] += len(result)
+        checkpoint["read"] += len(chunk)
+        for status, count in result.status.value_counts().items():
+            checkpoint["status"][status] = checkpoint["status"].get(status, 0) + int(count)
+        _save_checkpoint(out_dir, checkpoint)
+        if progress:
+            progress(n, checkpoint["rows"])
+
+    return checkpoint
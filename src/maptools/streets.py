@@ -0,0 +1,254 @@
+import os
+import hashlib
+import warnings
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+
+from . import cache
+from . import download
+from . import address
+
+# TIGER/Line ADDRFEAT columns used for the address range index
+ADDRFEAT_COLUMNS = ["TLID", "FULLNAME", "LFROMHN", "LTOHN", "RFROMHN", "RTOHN",
+                    "ZIPL", "ZIPR", "PARITYL", "PARITYR"]
+
+# "179" or a Queens style "34-12", with an optional letter ("12A");
+# `house` is the whole token and `number` the numeric part
+HOUSE_NUMBER_RE = r'^(?P<house>(?P<number>\d+(?:-\d+)?)[A-Za-z]?)\s+(?P<name>.+)$'
+
+
+def house_number(numbers):
+    """
+    Convert house numbers to floats that sort in address order.
+    Hyphenated numbers are joined ("34-12" -> 3412), as the
+    TIGER/Line address ranges do.
+
+    Parameters:
+    -----------
+    numbers : pandas.Series
+        House numbers as strings.
+
+    Returns:
+    --------
+    pandas.Series of float, `NaN` where there is no number.
+    """
+    numbers = numbers.astype("string").str.replace("-", "", regex=False)
+    return pd.to_numeric(numbers, errors="coerce").astype(float)
+
+
+def address_ranges(edges):
+    """
+    Turn TIGER/Line ADDRFEAT edges into one address range per side of the street.
+
+    Parameters:
+    -----------
+    edges : GeoDataFrame
+        ADDRFEAT features (or EDGES features, which have the same address columns).
+
+    Returns:
+    --------
+    GeoDataFrame
+        With the columns tlid, street (see `address.normalize_street`), zip,
+        side ("L" or "R"), from_hn, to_hn, lo, hi, parity ("O", "E" or "B")
+        and the geometry of the edge.
+    """
+    edges = edges[edges.FULLNAME.notna()]
+    codes, uniques = pd.factorize(edges.FULLNAME)
+    street = np.array([address.normalize_street(name) for name in uniques], dtype=object)[codes]
+
+    sides = []
+    for side in ["L", "R"]:
+        ranges = pd.DataFrame({
+            "tlid": edges.TLID.to_numpy(),
+            "street": street,
+            "zip": edges[f"ZIP{side}"].to_numpy(),
+            "side": side,
+            "from_hn": house_number(edges[f"{side}FROMHN"]).to_numpy(),
+            "to_hn": house_number(edges[f"{side}TOHN"]).to_numpy(),
+            "parity": edges[f"PARITY{side}"].fillna("B").to_numpy(),
+            "geometry": edges.geometry.to_numpy(),
+        })
+        sides.append(ranges.dropna(subset=["zip", "from_hn", "to_hn"]))
+
+    ranges = pd.concat(sides, ignore_index=True)
+    ranges["lo"] = np.minimum(ranges.from_hn, ranges.to_hn)
+    ranges["hi"] = np.maximum(ranges.from_hn, ranges.to_hn)
+    for col in ["street", "zip", "side", "parity"]:
+        ranges[col] = ranges[col].astype("string")
+    ranges = ranges.sort_values(["street", "zip", "lo"], ignore_index=True)
+    return gpd.GeoDataFrame(ranges, geometry="geometry", crs=edges.crs)
+
+
+def build_index(counties, vintage=2023, path=None, max_workers=8):
+    """
+    Build the offline geocoding index from the TIGER/Line ADDRFEAT
+    files of some counties. The files are downloaded through the
+    boundary cache (see `cache.fetch`) and the index is saved as
+    GeoParquet so it only has to be built once.
+
+    Parameters:
+    -----------
+    counties : list of str
+        5 digit county FIPS codes, e.g. `tiger.get_nyc_countyfps()`
+    vintage : int
+        The TIGER/Line year.
+    path : str
+        Where to save the index. Default is a file in the maptools cache.
+    max_workers : int
+        The number of files to download and read at once.
+
+    Returns:
+    --------
+    GeoDataFrame
+        The address ranges (see `address_ranges`), in EPSG:4326.
+    """
+    counties = sorted(counties)
+    path = path or index_path(counties, vintage)
+
+    def read_county(fips):
+        return cache.read("addrfeat", vintage, fips, columns=ADDRFEAT_COLUMNS)
+
+    edges, failures = download.fetch_all(counties, read_county, max_workers=max_workers)
+    for failure in failures:
+        warnings.warn(f"Failed to load ADDRFEAT for {failure['item']}: {failure['error']}")
+    if not edges:
+        raise ValueError(f"No ADDRFEAT data for {counties}")
+
+    edges = gpd.GeoDataFrame(pd.concat(edges, ignore_index=True), crs=edges[0].crs)
+    index = address_ranges(edges).to_crs("EPSG:4326")
+    index.to_parquet(path)
+    return index
+
+
+def index_path(counties, vintage=2023):
+    """The default location of the index for some counties."""
+    name = f"addrfeat_{vintage}_{'_'.join(sorted(counties))}.parquet"
+    if len(name) > 120:
+        digest = hashlib.sha1(" ".join(sorted(counties)).encode()).hexdigest()[:16]
+        name = f"addrfeat_{vintage}_{digest}.parquet"
+    return os.path.join(cache.cache_dir("streets"), name)
+
+
+def load_index(counties=None, vintage=2023, path=None):
+    """
+    Load a saved index, building it if it doesn't exist yet.
+
+    Parameters:
+    -----------
+    counties : list of str
+        5 digit county FIPS codes. Not needed if `path` exists.
+    vintage : int
+        The TIGER/Line year.
+    path : str
+        The index file. Default is the location `build_index` uses.
+
+    Returns:
+    --------
+    GeoDataFrame
+    """
+    path = path or index_path(counties, vintage)
+    if os.path.exists(path):
+        return gpd.read_parquet(path)
+    if not counties:
+        raise FileNotFoundError(path)
+    return build_index(counties, vintage, path)
+
+
+def geocode(df, index, addr_field="address", chunk_size=50_000):
+    """
+    Geocode addresses without a geocoding service, by interpolating
+    the house number along the street segment whose address range
+    contains it. The side of the street is chosen by the parity of the
+    house number (odd and even numbers are on opposite sides).
+
+    Each distinct street, zip code and house number is looked up once,
+    `chunk_size` at a time, with a join on street and zip code.
+
+    Parameters:
+    -----------
+    df : DataFrame
+        The data to geocode.
+    index : GeoDataFrame
+        The address ranges, from `build_index` or `load_index`.
+    addr_field : str
+        The column name of the address field.
+    chunk_size : int
+        The number of distinct addresses joined with the index at once.
+
+    Returns:
+    --------
+    GeoDataFrame
+        A copy of `df` with the columns `geometry`, `lat`, `lon`, `lookup_address`
+        and `status` like `address.geocode`. The status is "ok", "no_number"
+        (no house number), "no_street" (the street isn't in the index for the
+        zip code), "no_range" (no segment has the house number), or the parse
+        status of an address that couldn't be parsed (see `address.parse_addresses`).
+    """
+    parsed = address.parse_addresses(df[addr_field])
+    parts = parsed.street.str.extract(HOUSE_NUMBER_RE)
+    hn = house_number(parts.number)
+
+    codes, uniques = pd.factorize(parts.name)
+    names = np.array([address.normalize_street(name) for name in uniques] + [pd.NA], dtype=object)
+    queries = pd.DataFrame({
+        "street": pd.Series(names[codes], index=parsed.index, dtype="string"),
+        "zip": parsed.zip.str.slice(0, 5),
+        "hn": hn,
+    })
+    todo = queries[(parsed.status == "ok") & queries.hn.notna()].drop_duplicates()
+
+    ranges = pd.DataFrame({
+        "street": index.street,
+        "zip": index.zip,
+        "lo": index.lo,
+        "hi": index.hi,
+        "from_hn": index.from_hn,
+        "to_hn": index.to_hn,
+        "parity": index.parity,
+        "row": np.arange(len(index)),
+    })
+    known = set(ranges.street + "|" + ranges.zip)
+
+    matches = []
+    for start in range(0, len(todo), chunk_size):
+        chunk = todo.iloc[start:start + chunk_size]
+        pairs = chunk.merge(ranges, on=["street", "zip"])
+        odd = pairs.hn % 2 == 1
+        pairs = pairs[(pairs.lo <= pairs.hn) & (pairs.hn <= pairs.hi)
+                      & ((pairs.parity == "B") | ((pairs.parity == "O") == odd))]
+        matches.append(pairs.drop_duplicates(["street", "zip", "hn"]))
+    if matches:
+        matches = pd.concat(matches, ignore_index=True)
+    else:
+        # nothing to look up, but keep the column types for the merge below
+        matches = todo.merge(ranges, on=["street", "zip"])
+
+    span = (matches.to_hn - matches.from_hn).to_numpy(dtype=float)
+    offset = (matches.hn - matches.from_hn).to_numpy(dtype=float)
+    fraction = np.divide(offset, span, out=np.full(len(matches), 0.5), where=span != 0)
+    lines = index.geometry.iloc[matches.row.to_numpy(dtype=int)].reset_index(drop=True)
+    points = lines.interpolate(np.clip(fraction, 0, 1), normalized=True)
+    matches["lon"] = points.x.to_numpy()
+    matches["lat"] = points.y.to_numpy()
+
+    located = queries.merge(matches[["street", "zip", "hn", "lat", "lon"]],
+                            on=["street", "zip", "hn"], how="left")
+    located.index = parsed.index
+
+    status = parsed.status.copy()
+    ok = (parsed.status == "ok").to_numpy(dtype=bool)
+    has_street = (queries.street + "|" + queries.zip).isin(known).fillna(False).to_numpy(dtype=bool)
+    status[ok] = "no_range"
+    status[ok & ~has_street] = "no_street"
+    status[ok & queries.hn.isna().to_numpy()] = "no_number"
+    status[located.lat.notna().to_numpy()] = "ok"
+
+    result = df.copy()
+    result["lat"] = located.lat.astype(float)
+    result["lon"] = located.lon.astype(float)
+    result["lookup_address"] = parsed.lookup
+    result["status"] = status
+    geometry = gpd.points_from_xy(result.lon, result.lat)
+    geometry[result.lat.isna().to_numpy()] = None
+    return gpd.GeoDataFrame(result, geometry=geometry, crs=index.crs)
@@ -1,15 +1,22 @@
 from shapely.geometry import MultiPolygon, Polygon, GeometryCollection
 import os
 import os.path
-import requests
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 import re
+import io
 import zipfile
+import json
+import tempfile
+import threading
+import warnings
 import pandas as pd
 import geopandas as gpd
+import pyarrow as pa
+import pyarrow.dataset as ds
 import us
 
 from . import ui
+from . import cache
+from . import download as download_tools
 
 
 def get_nyc_countyfps():
@@ -28,7 +35,7 @@ def shoreline(df, state):
     """
     Clip the land area to the continental US.
     """
-    land = gpd.read_file("/home/mxc/Projects/cartopy/_data/cb_2018_us_state_500k.zip")
+    land = cache.read("state", 2018, resolution="500k")
     land.to_crs(df.crs, inplace=True)
     state_fips = us.states.lookup(state).fips
     land = land[land.STATEFP == state_fips]
@@ -38,8 +45,7 @@ def shoreline(df, state):
 
 
 def get_state_county_map(state, year=2023):
-    url = f"https://www2.census.gov/geo/tiger/TIGER{year}/COUNTY/tl_{year}_us_county.zip"
-    gdf = gpd.read_file(url)
+    gdf = cache.read("county", year)
     state_fips = us.states.lookup(state).fips
     counties = gdf[gdf.STATEFP == state_fips].copy()
     counties = shoreline(counties, state)
@@ -53,8 +59,7 @@ def get_state_county_map(state, year=2023):
 
 def get_tracts_map(state, counties, year=2023):
     state_fips = us.states.lookup(state).fips
-    url = f"https://www2.census.gov/geo/tiger/TIGER2022/TRACT/tl_2022_{state_fips}_tract.zip"
-    gdf = gpd.read_file(url)
+    gdf = cache.read("tract", 2022, state_fips)
     counties = gdf[gdf.STATEFP == state_fips].copy()
     counties["tooltip"] = counties.apply(lambda x: f"{x.NAME} ({x.COUNTYFP})", axis=1)
     counties["popup"] = counties.apply(ui.popup(["NAME", "STATEFP", "COUNTYFP"]), axis=1)
@@ -64,25 +69,100 @@ def get_tracts_map(state, counties, year=2023):
     return m
     
 
-def download(session, url, filename):
-    with session.get(url, stream=True) as response:
+def download(session, url, filename, fmt="geojson", keep=True):
+    """
+    Download a TIGER/Line .zip archive and convert the shape file inside it.
+    The shape file is read straight out of the archive, nothing is extracted to disk.
+
+    Parameters:
+    -----------
+    session : requests.Session
+        The session to use for the download.
+    url : str
+        The url of the .zip archive.
+    filename : str
+        The local path of the archive; converted files are written next to it.
+    fmt : str
+        "geojson", "parquet" (see `to_geoparquet`), or "gdf" to return
+        the GeoDataFrame without writing any output.
+    keep : bool
+        If `False` the archive is held in memory and never written to `filename`.
+
+    Returns:
+    --------
+    str or GeoDataFrame
+        The path of the converted file, or the GeoDataFrame if `fmt` is "gdf".
+    """
+    with session.get(url, stream=True, timeout=60) as response:
         response.raise_for_status()
 
-        with open(filename, 'wb') as file:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:  # Filter out keep-alive chunks
-                    file.write(chunk)
-    geojson = unzip(filename)
-    return geojson
+        if keep:
+            with open(filename, 'wb') as file:
+                for chunk in response.iter_content(chunk_size=1024 * 1024):
+                    if chunk:  # Filter out keep-alive chunks
+                        file.write(chunk)
+            source = filename
+        else:
+            source = response.content
 
+    gdf = read_zip(source)
+    if fmt == "gdf":
+        return gdf
+    return convert(gdf, filename, fmt)
+
+
+def read_zip(source, layer=None):
+    """
+    Read a zipped shape file into a GeoDataFrame without extracting it.
 
-def unzip(z):
+    Parameters:
+    -----------
+    source : str or bytes
+        The path of the .zip archive (read through GDAL's `/vsizip/`)
+        or the bytes of the archive (read from an in-memory buffer).
+    layer : str
+        The layer (shape file name) to read if the archive holds more than one.
+
+    Returns:
+    --------
+    GeoDataFrame
+    """
+    if isinstance(source, (bytes, bytearray)):
+        return gpd.read_file(io.BytesIO(source), layer=layer)
+    return gpd.read_file(f"/vsizip/{os.path.abspath(source)}", layer=layer)
+
+
+def convert(gdf, filename, fmt="geojson"):
+    """
+    Write `gdf` read from the archive `filename` as "geojson"
+    (next to the archive) or "parquet" (into the state partitioned
+    GeoParquet store next to the archive's directory).
+
+    Returns:
+    --------
+    str
+        The path of the GeoJSON file or GeoParquet store.
+    """
+    name = os.path.basename(filename).split('.')[0]
+    dir = os.path.dirname(filename)
+    if fmt == "parquet":
+        store = dir + ".parquet"
+        write_parquet(gdf, store, name)
+        return store
+    json_out = os.path.join(dir, f"{name}.geojson")
+    gdf.to_file(json_out, driver='GeoJSON')
+    return json_out
+
+
+def unzip(z, fmt="geojson"):
     dir = os.path.dirname(z)
     filename = os.path.basename(z)
     outdir = os.path.join(dir, filename.split('.')[0])
     os.makedirs(outdir, exist_ok=True)
     with zipfile.ZipFile(z, 'r') as zip_ref:
         zip_ref.extractall(outdir)
+    if fmt == "parquet":
+        return to_geoparquet(outdir)
     return to_geojson(outdir)
 
 
@@ -100,12 +180,180 @@ def to_geojson(dir):
     return None
 
 
-def load_tiger_dir(url, root=None):
+def to_geoparquet(dir):
+    """
+    Convert the shape file in `dir` into a partition of the GeoParquet
+    store next to it, e.g. `PLACE/tl_2023_36_place/` is written
+    to `PLACE.parquet/STATEFP=36/tl_2023_36_place.parquet`.
+
+    Returns:
+    --------
+    str
+        The path of the GeoParquet store, or `None` if there is no shape file.
+    """
+    parent = os.path.dirname(dir)
+    for file in os.listdir(dir):
+        if file.endswith('.shp'):
+            gdf = gpd.read_file(os.path.join(dir, file))
+            store = parent + ".parquet"
+            write_parquet(gdf, store, file.replace('.shp', ''))
+            return store
+    return None
+
+
+def write_parquet(gdf, path, name, partition_col="STATEFP"):
+    """
+    Write a GeoDataFrame to a GeoParquet store partitioned by state.
+    Each state is written to `{path}/{partition_col}={value}/{name}.parquet`
+    with a bbox covering column, so readers can skip whole states and
+    row groups without parsing the geometry.
+
+    Parameters:
+    -----------
+    gdf : GeoDataFrame
+        The data to write.
+    path : str
+        The directory of the GeoParquet store.
+    name : str
+        The file name for this data inside each partition, e.g. the
+        name of the TIGER/Line archive it came from.
+    partition_col : str
+        The column to partition on. Default is "STATEFP".
+
+    Returns:
+    --------
+    list
+        The files written.
+    """
+    files = []
+    for value, part in gdf.groupby(partition_col):
+        part_dir = os.path.join(path, f"{partition_col}={value}")
+        os.makedirs(part_dir, exist_ok=True)
+        out = os.path.join(part_dir, f"{name}.parquet")
+        part = part.drop(columns=[partition_col])
+        part.to_parquet(out, index=False, write_covering_bbox=True)
+        files.append(out)
+    return files
+
+
+def read_parquet(path, columns=None, states=None, bbox=None, partition_col="STATEFP"):
+    """
+    Read a GeoParquet store written by `write_parquet`.
+    Column selection, state filters, and the bounding box
+    are pushed down to the parquet reader, so only the
+    matching partitions and row groups are read.
+
+    Parameters:
+    -----------
+    path : str
+        The directory of the GeoParquet store.
+    columns : list of str
+        The columns to read. Default is all columns.
+        The geometry column is always included.
+    states : list of str
+        State FIPS codes or abbreviations to read. Default is all states.
+    bbox : tuple of float
+        Only read features intersecting (minx, miny, maxx, maxy).
+
+    Returns:
+    --------
+    GeoDataFrame
+    """
+    # keep the partition values as strings (pyarrow would read "01" as 1)
+    partitioning = ds.partitioning(pa.schema([(partition_col, pa.string())]), flavor="hive")
+
+    kwargs = {}
+    if columns is not None:
+        columns = list(columns)
+        if "geometry" not in columns:
+            columns.append("geometry")
+    if states is not None:
+        fips = [us.states.lookup(s).fips if not s.isdigit() else s for s in states]
+        kwargs["filters"] = ds.field(partition_col).isin(fips)
+    if bbox is not None:
+        kwargs["bbox"] = bbox
+
+    return gpd.read_parquet(path, columns=columns, partitioning=partitioning, **kwargs)
+
+
+def load_manifest(dir):
+    """Load the sync manifest of a mirrored TIGER directory (see `sync_archive`)."""
+    try:
+        with open(os.path.join(dir, "manifest.json"), "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_manifest(dir, manifest):
+    """Save the sync manifest, replacing the old one in a single step."""
+    path = os.path.join(dir, "manifest.json")
+    fd, tmp = tempfile.mkstemp(dir=dir, suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _outputs_exist(output):
+    outputs = [output] if isinstance(output, str) else output
+    return bool(outputs) and all(os.path.exists(path) for path in outputs)
+
+
+def sync_archive(session, url, filename, manifest, convert_func):
+    """
+    Mirror one archive incrementally. The remote size and last-modified
+    time are compared with the manifest entry for the file; if they
+    match and the converted output still exists nothing is done.
+    Otherwise the archive is downloaded (resuming a partial download
+    with an HTTP Range request) and converted again.
+
+    Parameters:
+    -----------
+    session : requests.Session
+        The session to use.
+    url : str
+        The url of the .zip archive.
+    filename : str
+        The local path of the archive.
+    manifest : dict
+        The manifest from `load_manifest`, updated in place.
+        The caller is responsible for saving it.
+    convert_func : callable
+        Called with the local archive path, returns the path of the converted
+        output, or a list of paths (e.g. the partition files `write_parquet`
+        wrote). The archive is converted again if any of them is missing.
+
+    Returns:
+    --------
+    str or list
+        The output of `convert_func`.
+    """
+    key = os.path.basename(filename)
+    info = download_tools.remote_info(session, url)
+    entry = manifest.get(key)
+    if entry and entry["size"] == info["size"] and entry["last_modified"] == info["last_modified"] \
+            and _outputs_exist(entry.get("output")):
+        return entry["output"]
+
+    if not (entry and entry["size"] == info["size"] and entry["last_modified"] == info["last_modified"]
+            and os.path.exists(filename)):
+        download_tools.resume_download(session, url, filename, info)
+    output = convert_func(filename)
+    manifest[key] = {**info, "output": output}
+    return output
+
+
+def load_tiger_dir(url, root=None, fmt="geojson", keep=True, max_workers=8,
+                   retries=5, rate=None, progress=None, report=False, sync=False):
     """
     Find all of the .zip files at the url
-    then download and unzip the archive,
-    look for .shp shape files, and convert
-    them to GeoJSON.
+    then download each archive, read the
+    .shp shape file out of it, and convert
+    it to GeoJSON (or GeoParquet).
+
+    Downloads run in a bounded pool sharing one pooled session.
+    Transient errors (timeouts, 429, 5xx) are retried with exponential
+    backoff, and a file that still fails doesn't stop the others.
 
     Parameters:
     -----------
@@ -113,37 +361,99 @@ def load_tiger_dir(url, root=None):
         The tigerline url of the directory containing the .zip files
     root : str
         The root directory to save the files. Default is the current working directory.
+    fmt : str
+        "geojson" to write a .geojson file per archive, or "parquet" to write
+        every archive into one GeoParquet store partitioned by state
+        (see `write_parquet`), or "gdf" to return the GeoDataFrames
+        without writing anything. Default is "geojson".
+    keep : bool
+        Keep the downloaded .zip archives. If `False` archives are only
+        held in memory. Default is `True`.
+    max_workers : int
+        The number of concurrent downloads. Default is 8.
+    retries : int
+        How many times to retry a download after a transient error. Default is 5.
+    rate : float
+        The maximum number of downloads started per second. Default is no limit.
+    progress : callable
+        Called as `progress(done, total, url, error)` after each archive.
+    report : bool
+        If `True` also return the failure report.
+    sync : bool
+        Mirror the directory incrementally: archives that haven't changed
+        since the last run (according to `manifest.json` in the directory)
+        are skipped, partial downloads are resumed, and only changed archives
+        are converted again. Archives are always kept in this mode, and with
+        "parquet" each archive's result is the list of partition files it wrote.
 
     Returns:
     --------
     list
-        A list of the GeoJSON files created from the shape files in the .zip archives.
+        A list of the GeoJSON files (or GeoParquet store, or GeoDataFrames)
+        created from the shape files in the .zip archives.
+        If `report` is `True`, a tuple of the list and a list of
+        `{"item": url, "error": exception}` for the archives that failed.
     
     """
     if not root:
         root = os.getcwd()
 
-    session = requests.Session()
+    session = download_tools.make_session(pool_size=max_workers)
 
     dir = url.split('/')[-2]
 
     dir = os.path.join(root, dir)
-    os.makedirs(dir, exist_ok=True)
-    html = session.get(url).text
+    if sync and fmt == "gdf":
+        raise ValueError("sync needs a file format, not 'gdf'")
+    if keep or sync or fmt != "gdf":
+        os.makedirs(dir, exist_ok=True)
+
+    def listing():
+        response = session.get(url, timeout=60)
+        response.raise_for_status()
+        return response.text
+
+    html = download_tools.retry(listing, retries=retries)
     # get all the .zip a hrefs on the page
     files = re.findall(r'href=[\'"]?([^\'" >]+\.zip)', html)
     # remove possible duplicates
-    files = list(files)
-    files = list(set(files))
-
-    results = []
-    with ThreadPoolExecutor() as executor:
-        futures = []
-        for file in files:
-            filename = os.path.join(dir, file)
-            zipurl = os.path.join(url, file)
-            futures.append(executor.submit(
-                download, session, zipurl, filename))
-        for future in as_completed(futures):
-            results.append(future.result())
+    files = sorted(set(files))
+
+    manifest = load_manifest(dir) if sync else None
+    manifest_lock = threading.Lock()
+
+    def fetch(file):
+        filename = os.path.join(dir, file)
+        zipurl = os.path.join(url, file)
+        if not sync:
+            return download(session, zipurl, filename, fmt, keep)
+
+        def convert_archive(z):
+            gdf = read_zip(z)
+            if fmt == "parquet":
+                # the archive's own partition files, so a missing state is converted again
+                return write_parquet(gdf, dir + ".parquet", file.split('.')[0])
+            return convert(gdf, z, fmt)
+
+        with manifest_lock:
+            entry = {file: manifest[file]} if file in manifest else {}
+        output = sync_archive(session, zipurl, filename, entry, convert_archive)
+        with manifest_lock:
+            manifest.update(entry)
+            save_manifest(dir, manifest)
+        return output
+
+    def report_progress(done, total, file, error):
+        if progress:
+            progress(done, total, os.path.join(url, file), error)
+
+    results, failures = download_tools.fetch_all(
+        files, fetch, max_workers=max_workers, retries=retries, rate=rate, progress=report_progress)
+
+    for failure in failures:
+        failure["item"] = os.path.join(url, failure["item"])
+        warnings.warn(f"Failed to load {failure['item']}: {failure['error']}")
+
+    if report:
+        return results, failures
     return results
@@ -23,10 +23,19 @@ import matplotlib as mpl
 import seaborn as sns
 import networkx as nx
 import folium
+from branca.element import MacroElement
+from jinja2 import Template
+from folium.plugins import MarkerCluster
 import numpy as np
-import random
 import math
-from shapely import Point
+import os
+import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import pyarrow as pa
+import pyarrow.parquet as pq
+import shapely
+import geopandas as gpd
 from shapely.geometry import LineString
 from functools import partial
 import xyzservices.providers as xyz
@@ -45,7 +54,7 @@ from .icons import hi_icons
 #     }
 
 
-def base_map(gdf=None, center=None, zoom=10, provider=xyz.CartoDB.Positron, name=""):
+def base_map(gdf=None, center=None, zoom=10, provider=xyz.CartoDB.Positron, name="", prefer_canvas=False):
     """
     Create a base map using Folium.
 
@@ -55,6 +64,7 @@ def base_map(gdf=None, center=None, zoom=10, provider=xyz.CartoDB.Positron, name
     - zoom: Initial zoom level of the map, scale is 1-18 (zoomed out --> zoomed in)
     - provider: Map tile provider from `xyzservices` (e.g., xyz.CartoDB.Positron, xyz.CartoDB.DarkMatter, etc.)
     - name: Name of the map (will show up if Layer Control is added)
+    - prefer_canvas: Draw vector layers on a canvas instead of SVG, much faster with many markers
 
     Returns:
     - folium.Map object
@@ -67,7 +77,8 @@ def base_map(gdf=None, center=None, zoom=10, provider=xyz.CartoDB.Positron, name
         center = [40.69018448848042, -73.98654521557344] # AU Brooklyn
 
     attr = "maptools" if not provider.attribution else provider.attribution
-    m = folium.Map(name=name, tiles=provider, attr=attr, location=center, zoom_start=zoom)
+    m = folium.Map(name=name, tiles=provider, attr=attr, location=center, zoom_start=zoom,
+                   prefer_canvas=prefer_canvas)
     return m
 
 
@@ -160,7 +171,7 @@ def div_icon(icon, row, m=None, size=16,
     return marker
 
 
-def cluster_radial(df, group_col, r):
+def cluster_radial(df, group_col, r, batched=False):
     """
     Creates 2 new geometry columns for each row in df, arranging points radially around
     a computed cluster center for each group.
@@ -171,9 +182,14 @@ def cluster_radial(df, group_col, r):
          Contains point geometries.
     group_col : str
          Column name to group on. Points in each group will be arranged radially around the group center.
-    r : int or callable
+    r : int, str or callable
          The radius (in meters) for the radial placement. If r is an int, it is used as a fixed radius.
+         If r is a column name, each row uses its own radius.
          If r is a function, it should accept (cluster_center, row) and return an int.
+    batched : bool
+         Call r once for all rows as `r(cluster_centers, df)`, where `cluster_centers`
+         is a GeoSeries aligned with the rows, and expect an array of radii back.
+         Much faster than calling r for each row.
 
     Returns
     -------
@@ -182,62 +198,60 @@ def cluster_radial(df, group_col, r):
          - `geometry`: the new point geometry replaces the cluster center; 
             placed at a fixed distance from the cluster center.
          - `spoke_geom`: a LineString from the cluster center to the new point geometry.
-         The GeoDataFrame’s active geometry will be set to `translated_geom`.
+         Rows are ordered by group, and the GeoDataFrame’s active geometry is `geometry`.
     """
-    import numpy as np
-    from shapely.geometry import LineString, Point
-    from shapely import affinity
-    import geopandas as gpd
-
-    df = df.copy()
-
-    def process_group(group):
-        group = group.copy()
-        n = len(group)
-        union = group.unary_union
-        if isinstance(union, Point):
-            cluster_center = union
-        else:
-            cluster_center = union.centroid
-
-        group["cluster_center"] = cluster_center
-
-        group["angle"] = np.linspace(0, 360, n, endpoint=False)
-
-        def update_row(row):
-            meters = r
-            if callable(r):
-                meters = r(cluster_center, row)
-
-            # Approximate conversion factors (these are rough estimates).
-            d_lat = meters / 111320 
-            d_lon = meters / (40075000 * np.cos(np.deg2rad(cluster_center.y)) / 360)
-
-            angle_rad = np.deg2rad(row["angle"])
-            dx = d_lon * np.cos(angle_rad)
-            dy = d_lat * np.sin(angle_rad)
-
-            new_point = affinity.translate(cluster_center, xoff=dx, yoff=dy)
-            spoke = LineString([(cluster_center.x, cluster_center.y), (new_point.x, new_point.y)])
-
-            row["geometry"] = new_point
-            row["spoke_geom"] = spoke
-            return row
+    df = df[df[group_col].notna()]
+    df = df.sort_values(group_col, kind="stable").reset_index(drop=True)
+    keys = df[group_col]
+    x = df.geometry.x.to_numpy()
+    y = df.geometry.y.to_numpy()
+
+    # the centroid of the distinct points in each group
+    coords = pd.DataFrame({"key": keys, "x": x, "y": y})
+    centers = coords.drop_duplicates().groupby("key")[["x", "y"]].mean()
+    cx = centers.x.reindex(keys).to_numpy()
+    cy = centers.y.reindex(keys).to_numpy()
+
+    position = keys.groupby(keys).cumcount().to_numpy()
+    size = keys.groupby(keys).transform("size").to_numpy()
+    angle = np.deg2rad(360 * position / size)
+
+    if batched:
+        center_points = gpd.GeoSeries(shapely.points(cx, cy), crs=df.crs)
+        meters = np.asarray(r(center_points, df), dtype=float)
+    elif callable(r):
+        center_points = shapely.points(cx, cy)
+        meters = np.array([r(center, row) for center, (_, row) in zip(center_points, df.iterrows())], dtype=float)
+    elif isinstance(r, str):
+        meters = df[r].to_numpy(dtype=float)
+    else:
+        meters = np.full(len(df), r, dtype=float)
 
-        return group.apply(update_row, axis=1)
+    # Approximate conversion factors (these are rough estimates).
+    d_lat = meters / 111320
+    d_lon = meters / (40075000 * np.cos(np.deg2rad(cy)) / 360)
+    px = cx + d_lon * np.cos(angle)
+    py = cy + d_lat * np.sin(angle)
 
-    result = df.groupby(group_col).apply(process_group).reset_index(drop=True)
-    result = result.drop(columns=["angle", "cluster_center"])
+    result = df.copy()
+    result["geometry"] = shapely.points(px, py)
+    spokes = np.stack([np.column_stack([cx, cy]), np.column_stack([px, py])], axis=1)
+    result["spoke_geom"] = gpd.GeoSeries(shapely.linestrings(spokes), crs=df.crs)
     return gpd.GeoDataFrame(result, geometry="geometry", crs=df.crs)
 
 
-
-
-
-def label_shapes(m, df, col, style={}):
+def label_shapes(m, df, col, style={}, mode="markers"):
     """Create a function that will add the string of `col`
-    to the center of each shape in df """
+    to the center of each shape in df.
+    With `mode="geojson"` the labels are written to the map as
+    one GeoJSON layer instead of a Marker for each shape."""
     style_str = ";".join([f"{k}:{v}" for k,v in style.items()])
+    if mode == "geojson":
+        centers = df.geometry.centroid
+        html = [f"""<div style="{style_str}">{label}</div>""" for label in df[col]]
+        PointLayer(_feature_collection(centers, {"html": html}), kind="label").add_to(m)
+        return m
+
     def label(row):  
         point = row.geometry.centroid
         html=f"""<div style="{style_str}">{row[col]}</div>"""
@@ -320,12 +334,19 @@ def map_legend(m, items, title="", position="topleft"):
     js = """
 function toggleMarkers(color) {
   console.log("toggling markers with color", color);
-  const markers = document.querySelectorAll('path.leaflet-interactive');
-  console.log(markers);
-  const toggle = document.querySelectorAll('path.leaflet-interactive[stroke="'+color+'"]');
-  console.log(toggle);
+  const markers = document.querySelectorAll('path.leaflet-interactive:not(.maptools-geojson)');
+  const toggle = document.querySelectorAll('path.leaflet-interactive[stroke="'+color+'"]:not(.maptools-geojson)');
   markers.forEach(marker => marker.classList.add("dim"));
   toggle.forEach(marker => marker.classList.remove("dim"));
+  // GeoJSON layers may be drawn on a canvas, which has no elements to style
+  (window.maptoolsLayers || []).forEach(layer => layer.eachLayer(marker => {
+    if (!marker.setStyle || !marker._maptoolsStyle) return;
+    const dim = marker.options.color === color ? 1 : .2;
+    marker.setStyle({
+      opacity: marker._maptoolsStyle.opacity * dim,
+      fillOpacity: marker._maptoolsStyle.fillOpacity * dim,
+    });
+  }));
 }
 """
 
@@ -363,10 +384,174 @@ function toggleMarkers(color) {
     return m
 
 
-def map_layers(m, df, radius=5):
+class PointLayer(MacroElement):
+    """
+    A GeoJSON layer of points, rendered in the browser.
+
+    All the features are written to the map as one FeatureCollection,
+    and `pointToLayer` turns each into a marker when the map loads, so
+    the saved HTML holds data instead of a JavaScript statement per point.
+    Feature properties drive the markers: `style` (Leaflet path options
+    overriding `options`), `tooltip`, `popup`, and `html` for labels.
+    Layers are registered in `window.maptoolsLayers` so `map_legend`
+    can toggle them.
+
+    Parameters
+    ----------
+    data: dict
+        A GeoJSON FeatureCollection of points (see `_feature_collection`)
+    kind: str
+        circle_marker (radius in pixels) | circle (radius in meters) | label (a DivIcon)
+    options: dict
+        The Leaflet path options shared by every marker
+    canvas: bool
+        Draw the markers on a canvas, even if the map doesn't `prefer_canvas`
+    cull: bool
+        Only add the markers within the viewport (padded by `cull_padding`,
+        a fraction of its size) to the map, updated whenever the map moves
+    """
+    _template = Template("""
+{% macro script(this, kwargs) %}
+var {{ this.get_name() }} = L.geoJson({{ this.data|tojson }}, {
+    pointToLayer: function(feature, latlng) {
+        var p = feature.properties;
+        {%- if this.kind == "label" %}
+        return L.marker(latlng, {icon: L.divIcon({html: p.html, className: "", iconSize: null})});
+        {%- else %}
+        var options = Object.assign({}, {{ this.options|tojson }}, p.style || {});
+        options.className = ((options.className || "") + " maptools-geojson").trim();
+        {%- if this.canvas %}
+        options.renderer = window.maptoolsCanvas = window.maptoolsCanvas || L.canvas();
+        {%- endif %}
+        var marker = L.{{ "circle" if this.kind == "circle" else "circleMarker" }}(latlng, options);
+        marker._maptoolsStyle = {opacity: marker.options.opacity, fillOpacity: marker.options.fillOpacity};
+        return marker;
+        {%- endif %}
+    },
+    onEachFeature: function(feature, layer) {
+        var p = feature.properties;
+        if (p.tooltip != null) { layer.bindTooltip(String(p.tooltip)); }
+        if (p.popup != null) { layer.bindPopup(String(p.popup)); }
+    }
+});
+{%- if this.cull %}
+(function(points) {
+    // only keep the markers near the viewport on the map
+    var visible = L.layerGroup();
+    var markers = points.getLayers();
+    var map = null;
+    function update() {
+        var bounds = map.getBounds().pad({{ this.cull_padding }});
+        markers.forEach(function(marker) {
+            var inside = bounds.contains(marker.getLatLng());
+            if (inside && !visible.hasLayer(marker)) { visible.addLayer(marker); }
+            else if (!inside && visible.hasLayer(marker)) { visible.removeLayer(marker); }
+        });
+    }
+    visible.on("add", function() { map = visible._map; map.on("moveend", update); update(); });
+    visible.on("remove", function() { map.off("moveend", update); visible.clearLayers(); });
+    visible.addTo({{ this._parent.get_name() }});
+})({{ this.get_name() }});
+{%- else %}
+{{ this.get_name() }}.addTo({{ this._parent.get_name() }});
+{%- endif %}
+window.maptoolsLayers = window.maptoolsLayers || [];
+window.maptoolsLayers.push({{ this.get_name() }});
+{% endmacro %}
+""")
+
+    def __init__(self, data, kind="circle_marker", options=None, canvas=True, cull=False, cull_padding=0.2):
+        super().__init__()
+        self._name = "PointLayer"
+        self.data = data
+        self.kind = kind
+        self.options = options or {}
+        self.canvas = canvas
+        self.cull = cull
+        self.cull_padding = cull_padding
+
+
+# how map_layers and create_layer draw points:
+# - markers: a folium object for each row
+# - geojson: one GeoJSON layer drawn on a canvas (see `PointLayer`)
+# - cluster: the GeoJSON layer in a Leaflet.markercluster group, which clusters
+#   nearby points at low zoom and skips the ones outside the viewport
+# - cull: the GeoJSON layer with only the points near the viewport on the map
+LAYER_MODES = ["markers", "geojson", "cluster", "cull"]
+
+# Leaflet.markercluster options for the cluster mode
+CLUSTER_OPTIONS = {"chunkedLoading": True, "disableClusteringAtZoom": 17, "maxClusterRadius": 60}
+
+
+def _add_points(layer, data, mode, kind="circle_marker", options=None):
+    """Add the `PointLayer` of a map_layers / create_layer mode to a FeatureGroup."""
+    if mode not in LAYER_MODES:
+        raise ValueError(f"Unknown mode {mode}, use one of {LAYER_MODES}")
+    parent = layer
+    if mode == "cluster":
+        parent = MarkerCluster(control=False, options=CLUSTER_OPTIONS).add_to(layer)
+    PointLayer(data, kind=kind, options=options, cull=mode == "cull").add_to(parent)
+
+
+def _feature_collection(points, properties={}):
+    """
+    Build a GeoJSON FeatureCollection from point geometries in one pass.
+
+    Parameters
+    ----------
+    points: GeoSeries
+        The points, in EPSG:4326
+    properties: dict
+        Property name -> a list or Series of values for each point.
+        Missing values become `null`.
+
+    Returns
+    -------
+    dict
+    """
+    x = np.round(points.x.to_numpy(), 6).tolist()
+    y = np.round(points.y.to_numpy(), 6).tolist()
+    columns = {}
+    for key, values in properties.items():
+        values = pd.Series(list(values), dtype=object)
+        columns[key] = values.where(values.notna(), None).tolist()
+    features = [
+        {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [x[i], y[i]]},
+            "properties": {key: values[i] for key, values in columns.items()},
+        }
+        for i in range(len(x))
+    ]
+    return {"type": "FeatureCollection", "features": features}
+
+
+def map_layers(m, df, radius=5, mode="markers"):
+    """
+    Add a layer to the map for each value of the "layer" column of df,
+    with a circle for each point colored by the "color" column, and the
+    "popup" and "title" columns (if present) as the popup and tooltip.
+    With `mode="geojson"` each layer is one GeoJSON FeatureCollection
+    drawn on a canvas (see `PointLayer`) instead of a Circle for each row;
+    "cluster" and "cull" also cluster the points or only draw the ones in
+    view (see `LAYER_MODES`). The legend toggling of `map_legend` works in every mode.
+    """
 
     def create_layer(df, name, color="color", popup="popup",title="title", radius=5):
         layer = folium.FeatureGroup(name=name)
+        if mode != "markers":
+            colors = df[color].tolist()
+            properties = {"style": [{"color": c, "fillColor": c} for c in colors]}
+            if popup in df:
+                properties["popup"] = df[popup]
+            if title in df:
+                properties["tooltip"] = df[title]
+            options = {"radius": 20, "fill": True, "fillOpacity": 1, "opacity": 1,
+                       "className": f"layer-marker layer-{name} zoomable"}
+            _add_points(layer, _feature_collection(df.geometry, properties), mode, "circle", options)
+            layer.add_to(m)
+            return layer
+
         def marker(row):
             
             info = row[popup] if popup in row else None
@@ -398,9 +583,62 @@ def map_layers(m, df, radius=5):
     return m
 
 
-def rand_points(geometry, n, max_conflicts=0):
+def sample_xy(geometry, n, rng=None, max_rounds=50):
+    """
+    Sample n random coordinates inside a geometry.
+
+    Candidates are drawn in batches from the bounding box and filtered
+    with `shapely.contains_xy`. The batch size is scaled by how much of
+    the bounding box the geometry fills, so thin or sparse shapes don't
+    need many rounds.
+
+    Parameters
+    ----------
+    geometry: shapely.geometry
+        The geometry to sample within
+    n: int
+        The number of points to create
+    rng: numpy.random.Generator
+        The random number generator to use
+    max_rounds: int
+        Give up (with a warning) after this many batches, e.g. for a line
+        or an empty geometry that no point can be inside.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        The x and y coordinates, n of each unless sampling gave up.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    if n <= 0 or geometry is None or geometry.is_empty:
+        return np.empty(0), np.empty(0)
+
+    minx, miny, maxx, maxy = geometry.bounds
+    box_area = (maxx - minx) * (maxy - miny)
+    fill = min(1, max(geometry.area / box_area, 0.01)) if box_area else 0.01
+    shapely.prepare(geometry)
+
+    xs, ys = [], []
+    need = n
+    for _ in range(max_rounds):
+        size = int(need / fill * 1.2) + 16
+        x = rng.uniform(minx, maxx, size)
+        y = rng.uniform(miny, maxy, size)
+        inside = shapely.contains_xy(geometry, x, y)
+        x, y = x[inside][:need], y[inside][:need]
+        xs.append(x)
+        ys.append(y)
+        need -= len(x)
+        if need == 0:
+            break
+    if need:
+        warnings.warn(f"Only placed {n - need} of {n} points in {geometry.geom_type}")
+    return np.concatenate(xs), np.concatenate(ys)
+
+
+def rand_points(geometry, n, max_conflicts=None, seed=None):
     """
-    Create n random points within the bounds of the geometry.
+    Create n random points within the geometry.
     
     Parameters
     ----------
@@ -408,54 +646,69 @@ def rand_points(geometry, n, max_conflicts=0):
         The geometry to create points within
     n: int
         The number of points to create
+    max_conflicts: int
+        Deprecated and ignored, random coordinates don't collide in practice.
+    seed: int
+        Seed the random numbers, for reproducible points
 
     Returns
     -------
-    GeoDataFrame
-        A GeoDataFrame with n random points within the geometry
+    DataFrame
+        A DataFrame with n random points within the geometry in its "geometry" column
 
     """
-    minx, miny, maxx, maxy = geometry.bounds
+    if max_conflicts is not None:
+        warnings.warn("rand_points ignores max_conflicts, it will be removed", DeprecationWarning, stacklevel=2)
+    x, y = sample_xy(geometry, n, np.random.default_rng(seed))
+    return pd.DataFrame({"geometry": shapely.points(x, y)})
+
 
-    plotted_points = set()
-    conflicts = 0
+def _dot_colors(gdf, color, cmap):
+    """The dot color of each row of `gdf` (see `dot_density`)."""
+    if color in gdf.columns and cmap:
+        return gdf[color].map(hexmap(cmap)).to_numpy()
+    if color in gdf.columns:
+        return gdf[color].to_numpy()
+    return np.full(len(gdf), color, dtype=object)
 
-    def occupied(p):
-        if p in plotted_points:
-            conflicts += 1
-            return True or conflicts > max_conflicts
-        plotted_points.add(p)
-        return False
 
-    def rand_point():
+def _dot_chunk(geometries, counts, start, seed):
+    """
+    Sample the dots of a chunk of geometries. Geometry `i` of the whole
+    frame always uses the random stream seeded with `(seed, i)`, so the
+    dots don't depend on how the frame is split between processes.
+    """
+    xs, ys, placed = [np.empty(0)], [np.empty(0)], []
+    for i, (geometry, n) in enumerate(zip(geometries, counts)):
+        x, y = sample_xy(geometry, n, np.random.default_rng([seed, start + i]))
+        xs.append(x)
+        ys.append(y)
+        placed.append(len(x))
+    return np.concatenate(xs), np.concatenate(ys), np.array(placed, dtype=int)
+
 
-        x = random.uniform(minx, maxx)
-        y = random.uniform(miny, maxy)
-        p = Point(x, y)
-        if p.within(geometry) and not occupied(p):
-            return p
-        return rand_point()
+def _dot_frame(x, y, placed, colors, crs):
+    points = gpd.GeoDataFrame({"color": np.repeat(colors, placed)},
+                              geometry=gpd.points_from_xy(x, y), crs=crs)
+    return points[["geometry", "color"]]
 
-    points = [rand_point() for i in range(n)]
-    if conflicts > 0:
-        print(f"Conflicts in plotting {n} points:", conflicts)
-    # create a GeoDataFrame from the points
-    points = pd.DataFrame({"geometry": points})
-    return points
 
+def _dot_setup(gdf, scale, count_col, seed):
+    counts = (gdf[count_col] // scale).fillna(0).astype(int).to_numpy()
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    return counts, seed
 
-def dot_density(gdf, scale=100, count_col='n', radius=5, column=None, color="blue", cmap=None, title=None, popup=None):
+
+def dot_density(gdf, scale=100, count_col='n', radius=5, column=None, color="blue", cmap=None, title=None, popup=None,
+                seed=None, max_workers=1, chunk_size=1000):
     """
-    Create a dot density map from the data in gdf. The map will
-    have a layer for each unique value in the "layer" column of the
-    DataFrame. The "color" column will be used to color the dots.
-    The "title" column will be used for the tooltip, and the "popup"
-    column will be used for the popup.
+    Create the points of a dot density map from the data in gdf:
+    `count_col // scale` random points inside each geometry, with
+    a "color" column for each dot.
 
     Parameters
     ----------
-    m: folium.Map
-        The map to add the dot density map to
     gdf: GeoDataFrame
         The data to plot
     count_col: str
@@ -466,41 +719,126 @@ def dot_density(gdf, scale=100, count_col='n', radius=5, column=None, color="blu
     radius: int
         The radius of the dots
     color: str
-        The column to use for the color of the dots
+        The column to use for the color of the dots, or a color for all of them
+    cmap: matplotlib.colors.Colormap
+        Map the `color` column through this colormap
     title: str
         The column to use for the tooltip
     popup: str
         The column to use for the popup
+    seed: int
+        Seed the random numbers, for a reproducible map.
+        The same seed gives the same dots for any `max_workers`.
+    max_workers: int
+        Sample in this many processes (see `dot_density_batches`); `None` uses every CPU
+    chunk_size: int
+        The number of geometries sent to a process at once
 
     Returns
     -------
-    folium.Map
-        The map with the dot density map added
+    GeoDataFrame
+        The dots, with "geometry" and "color" columns
     """
-    results = []
-
-    def fill_space(geometry):
-        def make_rand_points(row):
-            num_points = row[count_col] // scale
-            points = rand_points(row.geometry, num_points)
-            if color in row and cmap:
-                points["color"] = hexmap(cmap)(row[color])
-            elif color in row:
-                points["color"] = row[color]
-            else:
-                points["color"] = color
-
-            results.append(points)
-
-        gdf[gdf.geometry == geometry].apply(make_rand_points, axis=1)
-    
-    for geometry in gdf.geometry:
-        fill_space(geometry)
+    if max_workers != 1:
+        batches = list(dot_density_batches(gdf, scale, count_col, color, cmap, seed, chunk_size, max_workers))
+        if not batches:
+            return _dot_frame(np.empty(0), np.empty(0), np.empty(0, dtype=int), [], gdf.crs)
+        return pd.concat(batches, ignore_index=True)
 
+    counts, seed = _dot_setup(gdf, scale, count_col, seed)
+    x, y, placed = _dot_chunk(gdf.geometry.to_numpy(), counts, 0, seed)
+    return _dot_frame(x, y, placed, _dot_colors(gdf, color, cmap), gdf.crs)
 
-    points = pd.concat(results)
 
-    return points
+def dot_density_batches(gdf, scale=100, count_col="n", color="blue", cmap=None, seed=None,
+                        chunk_size=1000, max_workers=None):
+    """
+    Generate the dots of `dot_density` chunk by chunk, sampling the
+    chunks in parallel in a process pool. Only a few chunks are in
+    flight at a time, so a consumer that writes each batch out (see
+    `write_dot_density`) never holds all the dots in memory.
+
+    Parameters
+    ----------
+    gdf: GeoDataFrame
+        The data to plot
+    scale, count_col, color, cmap, seed:
+        As in `dot_density`
+    chunk_size: int
+        The number of geometries in each chunk
+    max_workers: int
+        The number of processes. Default is the number of CPUs.
+
+    Yields
+    ------
+    GeoDataFrame
+        The dots of each chunk of `gdf`, in order
+    """
+    counts, seed = _dot_setup(gdf, scale, count_col, seed)
+    colors = _dot_colors(gdf, color, cmap)
+    geometries = gdf.geometry.to_numpy()
+    workers = max_workers or os.cpu_count()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for start in range(0, len(gdf), chunk_size):
+            end = start + chunk_size
+            future = executor.submit(_dot_chunk, geometries[start:end], counts[start:end], start, seed)
+            pending.append((colors[start:end], future))
+            if len(pending) >= 2 * workers:
+                chunk_colors, future = pending.popleft()
+                yield _dot_frame(*future.result(), chunk_colors, gdf.crs)
+        while pending:
+            chunk_colors, future = pending.popleft()
+            yield _dot_frame(*future.result(), chunk_colors, gdf.crs)
+
+
+def _geoparquet_schema(crs):
+    geo = {
+        "version": "1.0.0",
+        "primary_column": "geometry",
+        "columns": {"geometry": {
+            "encoding": "WKB",
+            "geometry_types": ["Point"],
+            "crs": crs.to_json_dict() if crs else None,
+        }},
+    }
+    schema = pa.schema([("geometry", pa.binary()), ("color", pa.string())])
+    return schema.with_metadata({"geo": json.dumps(geo)})
+
+
+def write_dot_density(gdf, path, scale=100, count_col="n", color="blue", cmap=None, seed=None,
+                      chunk_size=1000, max_workers=None):
+    """
+    Write the dots of a dot density map to a GeoParquet file as they are
+    sampled (see `dot_density_batches`), one record batch per chunk.
+    Read it back with `geopandas.read_parquet`.
+
+    Parameters
+    ----------
+    gdf: GeoDataFrame
+        The data to plot
+    path: str
+        The GeoParquet file to write
+    scale, count_col, color, cmap, seed, chunk_size, max_workers:
+        As in `dot_density_batches`
+
+    Returns
+    -------
+    int
+        The number of dots written
+    """
+    schema = _geoparquet_schema(gdf.crs)
+    total = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for dots in dot_density_batches(gdf, scale, count_col, color, cmap, seed, chunk_size, max_workers):
+            batch = pa.record_batch([
+                pa.array(shapely.to_wkb(dots.geometry.to_numpy()), type=pa.binary()),
+                pa.array(dots.color.astype(str).to_numpy(), type=pa.string()),
+            ], schema=schema)
+            writer.write_batch(batch)
+            total += len(dots)
+    return total
 
 def map_js(m, file_path, js):
     """Add the custom javascript to the map
@@ -554,9 +892,13 @@ def map_header(m, file_path, html):
     return file_path
 
 
-def create_layer(m, data, name, style={"color": "blue", "weight": 0, "opacity": 0},tooltip=None,radius=2):
+def create_layer(m, data, name, style={"color": "blue", "weight": 0, "opacity": 0},tooltip=None,radius=2,
+                 mode="markers"):
     """Create a folium layer from the data. A new CircleMarker is created for
     each row in the DataFrame and added to map `m`.
+    With `mode="geojson"` the rows are added as one GeoJSON layer drawn on
+    a canvas instead (see `PointLayer`), which is much faster for large data;
+    "cluster" and "cull" also cluster the points or only draw the ones in view.
     Parameters
     ----------
     m: folium.Map
@@ -571,6 +913,8 @@ def create_layer(m, data, name, style={"color": "blue", "weight": 0, "opacity":
         The column name to use for the tooltip. Default is None.
     radius: int
         The radius of the circle markers. Default is 2.
+    mode: str
+        markers | geojson | cluster | cull, see `LAYER_MODES` (default is "markers")
 
     Returns
     -------
@@ -579,6 +923,13 @@ def create_layer(m, data, name, style={"color": "blue", "weight": 0, "opacity":
     """
     layer = folium.FeatureGroup(name=name)
 
+    if mode != "markers":
+        properties = {"popup": data[tooltip]} if tooltip else {}
+        options = {"fill": True, **style, "radius": radius}
+        _add_points(layer, _feature_collection(data.geometry, properties), mode, options=options)
+        layer.add_to(m)
+        return layer
+
     def marker(row):
         tool = row[tooltip] if tooltip else False
         return folium.CircleMarker(
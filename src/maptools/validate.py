@@ -0,0 +1,232 @@
+from collections import Counter
+import numpy as np
+import pandas as pd
+import us
+
+from . import address
+from . import streets
+
+STATES = {s.abbr for s in us.states.STATES_AND_TERRITORIES} | {"DC"}
+
+ZIP_RE = r'^\d{5}(?:-\d{4})?$'
+
+# points taken off the score of an address for each problem
+PENALTIES = {
+    "no_number": 30,
+    "bad_state": 40,
+    "bad_zip": 30,
+    "corrected_street": 10,
+    "unknown_street": 40,
+}
+
+# addresses scoring below this aren't worth sending to a geocoder
+MIN_SCORE = 60
+
+
+def edit_distance(a, b, max_distance=None):
+    """
+    The Levenshtein distance between two strings.
+
+    Parameters:
+    -----------
+    a, b : str
+    max_distance : int
+        Only compute the cells within `max_distance` of the diagonal and
+        return `max_distance + 1` once the distance is known to be larger.
+
+    Returns:
+    --------
+    int
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if max_distance is None:
+        max_distance = len(a)
+    elif len(a) - len(b) > max_distance:
+        return max_distance + 1
+    # cells outside the band can't lead to a distance within max_distance
+    outside = max_distance + 1
+    previous = [j if j <= max_distance else outside for j in range(len(b) + 1)]
+    for i, ca in enumerate(a, start=1):
+        lo, hi = max(1, i - max_distance), min(len(b), i + max_distance)
+        current = [outside] * (len(b) + 1)
+        if i <= max_distance:
+            current[0] = i
+        for j in range(lo, hi + 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != b[j - 1]))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return min(previous[-1], max_distance + 1)
+
+
+def _grams(name, n=3):
+    padded = f"${name}$"
+    return {padded[i:i + n] for i in range(max(1, len(padded) - n + 1))}
+
+
+def street_index(known):
+    """
+    Build an index of known street names for `correct_street`.
+
+    Parameters:
+    -----------
+    known : GeoDataFrame or pandas.Series
+        The address ranges from `streets.load_index`, or a Series of street names.
+        Names are normalized with `address.normalize_street`.
+
+    Returns:
+    --------
+    dict
+        `names` (the distinct names), `zips` (zip code -> set of names in it)
+        and `grams` (trigram -> the positions in `names` that contain it).
+    """
+    if isinstance(known, pd.DataFrame):
+        pairs = known[["street", "zip"]].dropna().drop_duplicates()
+        names = pairs.street.unique()
+        zips = pairs.groupby("zip").street.agg(set).to_dict()
+    else:
+        names = pd.Series([address.normalize_street(name) for name in known.dropna().unique()]).unique()
+        zips = {}
+
+    grams = {}
+    for i, name in enumerate(names):
+        for gram in _grams(name):
+            grams.setdefault(gram, []).append(i)
+    return {
+        "names": list(names),
+        "known": set(names),
+        "zips": zips,
+        "grams": {gram: np.array(ids) for gram, ids in grams.items()},
+    }
+
+
+def correct_street(name, index, zip_code=None, max_distance=2):
+    """
+    Find the known street closest to a (normalized) street name.
+
+    Candidates are the names sharing enough trigrams with `name` to be
+    within `max_distance` edits; only those are compared with `edit_distance`.
+
+    Parameters:
+    -----------
+    name : str
+        The normalized street name, e.g. "W 22ND ST".
+    index : dict
+        From `street_index`.
+    zip_code : str
+        Prefer streets in this zip code, if the index knows its streets.
+    max_distance : int
+        The most edits allowed.
+
+    Returns:
+    --------
+    tuple of (str, int)
+        The corrected name and its distance, or (`None`, `None`) if nothing is close enough.
+    """
+    in_zip = index["zips"].get(zip_code)
+    if name in index["known"] and (not in_zip or name in in_zip):
+        return name, 0
+
+    grams = _grams(name)
+    counts = Counter()
+    for gram in grams:
+        ids = index["grams"].get(gram)
+        if ids is not None:
+            counts.update(ids.tolist())
+    # each edit changes at most 3 trigrams
+    needed = len(grams) - 3 * max_distance
+
+    best = (None, max_distance + 1, 0)
+    for i, shared in counts.most_common():
+        if shared < needed:
+            break
+        candidate = index["names"][i]
+        if in_zip and candidate not in in_zip:
+            continue
+        distance = edit_distance(name, candidate, max_distance)
+        if distance < best[1]:
+            best = (candidate, distance, shared)
+    if best[0] is None:
+        return None, None
+    return best[0], best[1]
+
+
+def validate(addresses, index=None, max_distance=2, min_score=MIN_SCORE):
+    """
+    Score addresses before geocoding them and correct misspelled streets.
+
+    Addresses are parsed with `address.parse_addresses`. Street suffixes
+    are standardized (e.g. VILLIAGE -> VLG, SUMITT -> SMT, see
+    `address.USPS_SUFFIX_ABBR`), and with an `index` each street is
+    checked against the known streets, and corrected if it's a near miss.
+    Each distinct street is only looked up once.
+
+    Parameters:
+    -----------
+    addresses : pandas.Series
+        The addresses, e.g. "179 Livingston St, Brooklyn, NY 11201"
+    index : dict
+        The known streets, from `street_index`. Without it streets aren't checked.
+    max_distance : int
+        The most edits allowed when correcting a street name.
+    min_score : int
+        The lowest score of a valid address.
+
+    Returns:
+    --------
+    DataFrame
+        The columns of `address.parse_addresses` plus
+        - street_name: the normalized (and corrected) street name, without the house number
+        - number: the house number, with its letter if any ("12A")
+        - corrected: True if the street name was corrected
+        - lookup: rebuilt from the corrected street
+        - issues: the problems found, separated by spaces (see `PENALTIES`)
+        - score: 100 minus the penalties, 0 if the address couldn't be parsed
+        - valid: the score is at least `min_score`
+    """
+    parsed = address.parse_addresses(addresses)
+    ok = (parsed.status == "ok").to_numpy(dtype=bool)
+    parts = parsed.street.str.extract(streets.HOUSE_NUMBER_RE)
+    rest = parts.name.fillna(parsed.street)
+
+    codes, uniques = pd.factorize(rest)
+    names = np.array([address.normalize_street(u) for u in uniques] + [pd.NA], dtype=object)
+    street_name = pd.Series(names[codes], index=parsed.index, dtype="string")
+    zip5 = parsed.zip.str.slice(0, 5)
+
+    issues = {issue: np.zeros(len(parsed), dtype=bool) for issue in PENALTIES}
+    issues["no_number"] = ok & parts.number.isna().to_numpy()
+    issues["bad_state"] = ok & ~parsed.state.str.upper().isin(STATES).fillna(False).to_numpy(dtype=bool)
+    issues["bad_zip"] = ok & ~parsed.zip.str.match(ZIP_RE).fillna(False).to_numpy(dtype=bool)
+
+    corrected = np.zeros(len(parsed), dtype=bool)
+    if index is not None:
+        pairs = pd.DataFrame({"name": street_name, "zip": zip5})[ok].drop_duplicates()
+        fixes = {(name, z): correct_street(name, index, z, max_distance)
+                 for name, z in pairs.itertuples(index=False)}
+        keys = list(zip(street_name, zip5))
+        fixed = np.array([fixes.get(key, (None, None))[0] for key in keys], dtype=object)
+        known = ok & pd.notna(fixed)
+        corrected = known & (np.where(known, fixed, "") != street_name.fillna("").to_numpy(dtype=object))
+        street_name = street_name.where(~corrected, fixed)
+        issues["corrected_street"] = corrected
+        issues["unknown_street"] = ok & ~known
+
+    street = (parts.house.fillna("") + " " + street_name).str.strip()
+    result = parsed.copy()
+    result["street"] = street.where(ok)
+    result["lookup"] = (street + ", " + parsed.city + ", " + parsed.state + " " + parsed.zip).where(ok)
+    result["street_name"] = street_name.where(ok)
+    result["number"] = parts.house
+    result["corrected"] = corrected
+
+    penalty = sum(PENALTIES[issue] * flags for issue, flags in issues.items())
+    score = np.where(ok, np.clip(100 - penalty, 0, 100), 0)
+    text = pd.Series("", index=parsed.index, dtype="string")
+    for issue, flags in issues.items():
+        text = text.where(~flags, text + " " + issue)
+    result["issues"] = text.str.strip().where(ok, parsed.status)
+    result["score"] = score
+    result["valid"] = score >= min_score
+    return result
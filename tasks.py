@@ -102,13 +102,70 @@ def hero_icons(c):
         json.dump(icons, f, indent=2)
 
 
+def sync_tiger(urls, zipdir, convert):
+    """Mirror the TIGER archives at `urls` into `zipdir`, calling `convert(zip_path)`
+    only for archives that are new or changed since the last run.
+    Returns the outputs and the number of archives that were converted."""
+    import requests
+    from maptools import tiger, download
+
+    session = download.make_session()
+    manifest = tiger.load_manifest(zipdir)
+    outputs = []
+    changed = []
+
+    def tracked(z):
+        changed.append(z)
+        return convert(z)
+
+    for url in urls:
+        local = os.path.join(zipdir, os.path.basename(url))
+        try:
+            output = download.retry(tiger.sync_archive, session, url, local, manifest, tracked)
+        except requests.HTTPError as e:
+            print("No data for", url, e)
+            continue
+        tiger.save_manifest(zipdir, manifest)
+        outputs.append(output)
+    print(f"{len(changed)} of {len(outputs)} archives changed")
+    return outputs, len(changed)
+
+
 @task
-def tiger_places(c):
-    """Download the census place data."""
+def tiger_places(c, parquet=False, sync=False):
+    """Download the census place data.
+    Use --parquet to write a GeoParquet store partitioned by state instead of GeoJSON.
+    Use --sync to only download and convert archives that changed since the last run."""
+    from maptools import tiger
+
+    places = list(range(1, 57)) + [60,66,69,72,78]
+
+    if sync:
+        c.run("mkdir -p _data/census_place")
+        c.run("mkdir -p data/census_place")
+
+        def convert(z):
+            place = os.path.basename(z).replace(".zip", "")
+            df = tiger.read_zip(z)
+            df["STATE"] = df.STATEFP.map(us.states.mapping('fips', 'abbr'))
+            if parquet:
+                # the state's partition files, so the manifest notices if one goes missing
+                return tiger.write_parquet(df, "data/census_place.parquet", place)
+            df.to_file(f"data/census_place/{place}.geojson", driver="GeoJSON")
+            return f"data/census_place/{place}.geojson"
+
+        urls = [f"https://www2.census.gov/geo/tiger/TIGER2023/PLACE/tl_2023_{str(num).zfill(2)}_place.zip"
+                for num in places]
+        outputs, changed = sync_tiger(urls, "_data/census_place", convert)
+        if not parquet and changed:
+            combined = pd.concat([gpd.read_file(f) for f in outputs])
+            combined = gpd.GeoDataFrame(combined)
+            combined.to_file("_data/census_place/census_place.geojson", driver="GeoJSON")
+        return
+
     c.run("rm -rf _data/census_place")
     c.run("mkdir -p _data/census_place")
     c.run("mkdir -p data/census_place")
-    places = list(range(1, 57)) + [60,66,69,72,78]
 
     results = []
     for num in places:
@@ -124,25 +181,54 @@ def tiger_places(c):
         c.run(f"rm {local}")
         df = gpd.read_file(f"_data/census_place/{place}.shp")
         df["STATE"] = df.STATEFP.map(us.states.mapping('fips', 'abbr'))
+        if parquet:
+            tiger.write_parquet(df, "data/census_place.parquet", place)
+            continue
         df.to_file(f"data/census_place/{place}.geojson", driver="GeoJSON")
         results.append(df)
 
+    if parquet:
+        return
+
     combined = pd.concat(results)
     combined = gpd.GeoDataFrame(combined)
     combined.to_file("_data/census_place/census_place.geojson", driver="GeoJSON")
 
 
 @task
-def tiger_tracts(c):
-    """Download the census tract data."""
+def tiger_tracts(c, parquet=False, sync=False):
+    """Download the census tract data.
+    Use --parquet to write a GeoParquet store partitioned by state instead of GeoJSON.
+    Use --sync to only download and convert archives that changed since the last run."""
+    from maptools import tiger
 
     dir = "_data/tiger_tracts"
 
-    c.run(f"rm -rf {dir}")
-    c.run(f"mkdir -p {dir}")
+    fips = list(range(1, 57)) + [60, 66, 69, 72, 78]
 
+    if sync:
+        c.run(f"mkdir -p {dir}/zip")
+
+        def convert(z):
+            tract = os.path.basename(z).replace(".zip", "")
+            df = tiger.read_zip(z)
+            df["STATE"] = df.STATEFP.map(us.states.mapping('fips', 'abbr'))
+            if parquet:
+                return tiger.write_parquet(df, f"{dir}/us_tiger_tracts.parquet", tract)
+            df.to_file(f"{dir}/{tract}.geojson", driver="GeoJSON")
+            return f"{dir}/{tract}.geojson"
+
+        urls = [f"https://www2.census.gov/geo/tiger/TIGER2023/TRACT/tl_2023_{str(fip).zfill(2)}_tract.zip"
+                for fip in fips]
+        outputs, changed = sync_tiger(urls, f"{dir}/zip", convert)
+        if not parquet and changed:
+            combined = pd.concat([gpd.read_file(f) for f in outputs])
+            combined = gpd.GeoDataFrame(combined)
+            combined.to_file(f"{dir}/us_tiger_tracts.geojson", driver="GeoJSON")
+        return
 
-    fips = list(range(1, 57)) + [60, 66, 69, 72, 78]
+    c.run(f"rm -rf {dir}")
+    c.run(f"mkdir -p {dir}")
 
     results = []
     for fip in fips:
@@ -159,9 +245,15 @@ def tiger_tracts(c):
         c.run(f"rm {local}")
         df = gpd.read_file(f"{dir}/{tract}.shp")
         df["STATE"] = df.STATEFP.map(us.states.mapping('fips', 'abbr'))
+        if parquet:
+            tiger.write_parquet(df, f"{dir}/us_tiger_tracts.parquet", tract)
+            continue
         df.to_file(f"{dir}/{tract}.geojson", driver="GeoJSON")
         results.append(df)
 
+    if parquet:
+        return
+
     combined = pd.concat(results)
     combined = gpd.GeoDataFrame(combined)
     combined.to_file(f"{dir}/us_tiger_tracts.geojson", driver="GeoJSON")
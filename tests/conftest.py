@@ -0,0 +1,127 @@
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+
+# keep the tests out of the real cache; set before maptools is imported
+os.environ["MAPTOOLS_CACHE_DIR"] = tempfile.mkdtemp(prefix="maptools-test-")
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Serves `server.files` (path -> (body, etag)), answers If-None-Match with
+    304 and a Range request (if If-Range still matches) with 206. A file can
+    also be a function of the query parameters returning (status, body).
+    """
+
+    def do_HEAD(self):
+        self.respond(head=True)
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get("If-None-Match")))
+        self.respond()
+
+    def respond(self, head=False):
+        self.server.log.append((self.command, self.path, dict(self.headers)))
+        path, _, query = self.path.partition("?")
+        if callable(self.server.files.get(path)):
+            status, body = self.server.files[path](parse_qs(query))
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if self.path not in self.server.files:
+            self.send_error(404)
+            return
+        body, etag = self.server.files[self.path]
+        if etag and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        start = 0
+        if not head and self.headers.get("Range") and self.headers.get("If-Range", etag) == etag:
+            start = int(self.headers["Range"].split("=")[1].rstrip("-"))
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+        else:
+            self.send_response(200)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body) - start))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body[start:])
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def http_server():
+    """
+    A local http server; add files to its `files`. `requests` has the path and
+    If-None-Match of each GET, and `log` the method, path and headers of every request.
+    """
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.files = {}
+    httpd.requests = []
+    httpd.log = []
+    httpd.url = f"http://127.0.0.1:{httpd.server_port}"
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """An empty maptools cache for one test."""
+    from maptools import cache
+
+    path = tmp_path / "cache"
+    monkeypatch.setattr(cache, "CACHE_DIR", str(path))
+    return path
+
+
+@pytest.fixture
+def address_index():
+    """A one block address range index: 0-100 Livingston St (evens on the right, odds on the left)."""
+    import geopandas as gpd
+    from shapely import LineString
+    from maptools import streets
+
+    edges = gpd.GeoDataFrame({
+        "TLID": [1],
+        "FULLNAME": ["Livingston St"],
+        "LFROMHN": ["1"], "LTOHN": ["101"],
+        "RFROMHN": ["0"], "RTOHN": ["100"],
+        "ZIPL": ["11201"], "ZIPR": ["11201"],
+        "PARITYL": ["O"], "PARITYR": ["E"],
+    }, geometry=[LineString([(-74.0, 40.7), (-73.99, 40.7)])], crs="EPSG:4326")
+    return streets.address_ranges(edges)
+
+
+
+@pytest.fixture
+def zip_shapefile(tmp_path):
+    """Make the bytes of a zip archive holding a GeoDataFrame as a shapefile, like the TIGER/Line downloads."""
+    import io
+    import zipfile
+
+    def make(gdf, name):
+        folder = tmp_path / f"{name}_shp"
+        folder.mkdir()
+        gdf.to_file(folder / f"{name}.shp")
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            for file in sorted(folder.iterdir()):
+                archive.write(file, file.name)
+        return buffer.getvalue()
+
+    return make
@@ -0,0 +1,160 @@
+import pandas as pd
+import pytest
+
+from maptools import address
+
+
+@pytest.mark.parametrize("street, expected", [
+    ("179 LIVINGSTON ST 7FL", ("179 LIVINGSTON", "ST", "7FL")),
+    ("55 Main St.", ("55 Main", "ST", None)),
+    # only whole words are suffixes
+    ("12 MAINSTREAM", ("12 MAINSTREAM", "", None)),
+    # the last suffix wins
+    ("1 PARK AVE", ("1 PARK", "AVE", None)),
+    ("1 BROADWAY", ("1", "BROADWAY", None)),
+    # multi word suffixes
+    ("20 TERRACE PLACE", ("20", "TERRACE PLACE", None)),
+    # suffixes in the unit are ignored
+    ("10 MAIN ST APT 4B", ("10 MAIN", "ST", "APT 4B")),
+    ("10 MAIN ST APT 4 PL", ("10 MAIN", "ST", "APT 4 PL")),
+    ("5 OAK ST #2", ("5 OAK", "ST", "#2")),
+])
+def test_split_street(street, expected):
+    assert address.split_street(street) == expected
+
+
+def test_street_suffix():
+    assert address.street_suffix("W 22 ST") == "ST"
+    with pytest.warns(UserWarning):
+        assert address.street_suffix("12 MAINSTREAM") == ""
+
+
+def test_normalize_cache():
+    address.normalize_cache_clear()
+    first = address.split_street("179 LIVINGSTON ST")
+    assert address.split_street("179 LIVINGSTON ST") is first
+    info = address.normalize_cache_info()["split_street"]
+    assert (info["hits"], info["misses"], info["hit_rate"]) == (1, 1, 0.5)
+
+    # equal strings parsed from different addresses are the same object
+    a = address.parse_address("179 Livingston St, Brooklyn, NY 11201")
+    b = address.parse_address("180 Livingston St, Brooklyn, NY 11201")
+    assert a["city"] is b["city"]
+
+    address.normalize_cache_clear()
+    assert address.normalize_cache_info()["split_street"]["size"] == 0
+    assert address.normalize_cache_info()["split_street"]["hit_rate"] is None
+
+
+def test_ordinal_suffixes():
+    numbers = [0, 1, 2, 3, 4, 11, 12, 13, 20, 21, 22, 23, 101, 111, 112, 1000]
+    expected = ["th", "st", "nd", "rd", "th", "th", "th", "th", "th", "st", "nd", "rd",
+                "st", "th", "th", "th"]
+    assert address.ordinal_suffixes(numbers).tolist() == expected
+    assert [address.ordinal_suffix(n) for n in numbers] == expected
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("West 22 Street", "W 22ND ST"),
+    ("W 22nd St.", "W 22ND ST"),
+    ("Boerum Place", "BOERUM PL"),
+])
+def test_normalize_street(name, expected):
+    assert address.normalize_street(name) == expected
+
+
+def test_parse_addresses():
+    addresses = pd.Series(["179 Livingston St 7FL, Brooklyn, NY 11201",
+                           "100 W 22 St, New York, NY 10011",
+                           "",
+                           None,
+                           "Somewhere",
+                           "12 Mainstream, Brooklyn, NY 11201"], index=range(10, 16))
+    result = address.parse_addresses(addresses)
+    assert result.index.tolist() == list(range(10, 16))
+    assert result.status.tolist() == ["ok", "ok", "missing", "missing", "unparsed", "no_suffix"]
+    assert result.street.iloc[:2].tolist() == ["179 Livingston ST", "100 W 22nd ST"]
+    assert result.unit.iloc[0] == "7FL" and pd.isna(result.unit.iloc[1])
+    assert result.lookup.iloc[0] == "179 Livingston ST, Brooklyn, NY 11201"
+    assert result[["city", "state", "zip"]].iloc[1].tolist() == ["New York", "NY", "10011"]
+    # only the parsed addresses have parts
+    assert result.drop(columns="status").iloc[2:].isna().all().all()
+
+
+def test_parse_addresses_categorical():
+    addresses = pd.Series(["1 Main St, Brooklyn, NY 11201", "2 Main St, Brooklyn, NY 11201"])
+    result = address.parse_addresses(addresses, categorical=True)
+    assert (result.dtypes == "category").all()
+    assert result.city.cat.categories.tolist() == ["Brooklyn"]
+
+
+class Location:
+    def __init__(self, latitude, longitude):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.raw = {"lat": str(latitude), "lon": str(longitude)}
+
+
+class Geocoder:
+    """Finds the streets in `places`, fails for any street starting with 13."""
+
+    def __init__(self, places):
+        self.places = places
+        self.queries = []
+
+    def geocode(self, query, timeout=None, **kwargs):
+        self.queries.append(query)
+        if query["street"].startswith("13 "):
+            raise ValueError("bad request")
+        return self.places.get(query["street"])
+
+
+@pytest.fixture
+def geocoder():
+    return Geocoder({"179 Livingston ST": Location(40.69, -73.99), "100 W 22nd ST": Location(40.74, -73.99)})
+
+
+GEOCODE_ADDRESSES = ["179 Livingston St, Brooklyn, NY 11201",
+                     "100 W 22 St, New York, NY 10011",
+                     "179 Livingston St 7FL, Brooklyn, NY 11201",
+                     "1 Nowhere St, Brooklyn, NY 11201",
+                     "13 Main St, Brooklyn, NY 11201",
+                     "Somewhere"]
+
+
+def test_geocode(geocoder):
+    df = pd.DataFrame({"address": GEOCODE_ADDRESSES, "n": range(6)})
+    result = address.geocode(df, geocoder, max_workers=2, retries=0)
+    assert result.crs == "EPSG:4326"
+    assert result.n.tolist() == list(range(6))
+    assert result.status.tolist() == ["ok", "ok", "ok", "not_found", "error", "unparsed"]
+    assert result.lat.iloc[:3].tolist() == [40.69, 40.74, 40.69]
+    assert result.geometry.iloc[0].x == -73.99
+    assert result.geometry.iloc[3:].isna().all()
+    assert result.lookup_address.iloc[2] == "179 Livingston ST, Brooklyn, NY 11201"
+    # the unit doesn't make a new lookup
+    assert len(geocoder.queries) == 4
+    assert {"street": "100 W 22nd ST", "city": "New York", "state": "NY", "postalcode": "10011"} in geocoder.queries
+    # the caller's frame isn't changed
+    assert list(df.columns) == ["address", "n"]
+
+
+def test_geocode_progress(geocoder):
+    calls = []
+    df = pd.DataFrame({"address": GEOCODE_ADDRESSES[:2]})
+    address.geocode(df, geocoder, max_workers=1, progress=lambda *args: calls.append(args))
+    assert [(done, total) for done, total, lookup, error in calls] == [(1, 2), (2, 2)]
+
+
+def test_geocode_cache(geocoder, tmp_path):
+    db = str(tmp_path / "geocode.sqlite")
+    df = pd.DataFrame({"address": GEOCODE_ADDRESSES})
+    first = address.geocode(df, geocoder, retries=0, cache=db)
+    assert len(geocoder.queries) == 4
+
+    # hits and misses are cached, errors are tried again
+    second = address.geocode(df, geocoder, retries=0, cache=db)
+    assert len(geocoder.queries) == 5
+    assert geocoder.queries[-1]["street"] == "13 Main ST"
+    assert second.status.tolist() == first.status.tolist()
+    assert second.lat.iloc[:3].tolist() == first.lat.iloc[:3].tolist()
@@ -0,0 +1,104 @@
+import os
+
+import pytest
+import requests
+
+from maptools import cache
+
+
+def path_of(dataset, vintage=2023):
+    return f"/TIGER{vintage}/{dataset.upper()}/tl_{vintage}_us_{dataset}.zip"
+
+
+@pytest.fixture
+def server(http_server, cache_dir, monkeypatch):
+    http_server.files.update({
+        path_of("state"): (b"state v1", '"s1"'),
+        path_of("county"): (b"county v1", '"c1"'),
+        path_of("tract"): (b"tract v1", '"t1"'),
+    })
+    monkeypatch.setattr(cache, "TIGER_URL", http_server.url)
+    return http_server
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_boundary_url(monkeypatch):
+    monkeypatch.setattr(cache, "TIGER_URL", "http://tiger")
+    assert cache.boundary_url("tract", 2023, "36") == "http://tiger/TIGER2023/TRACT/tl_2023_36_tract.zip"
+    assert cache.boundary_url("county", 2022, resolution="500k") == \
+        "http://tiger/GENZ2022/shp/cb_2022_us_county_500k.zip"
+
+
+def test_fetch_downloads_once(server):
+    path = cache.fetch("state", 2023)
+    assert read(path) == b"state v1"
+    assert path.startswith(cache.CACHE_DIR)
+
+    # still fresh, so the server isn't asked again
+    assert cache.fetch("state", 2023) == path
+    assert server.requests == [(path_of("state"), None)]
+
+
+def test_fetch_revalidates(server):
+    path = cache.fetch("state", 2023)
+
+    # unchanged on the server: a 304 and the same file
+    assert cache.fetch("state", 2023, max_age=0) == path
+    assert server.requests[-1] == (path_of("state"), '"s1"')
+    assert read(path) == b"state v1"
+
+    # changed on the server: downloaded again
+    server.files[path_of("state")] = (b"state v2", '"s2"')
+    updated = cache.fetch("state", 2023, max_age=0)
+    assert updated != path
+    assert read(updated) == b"state v2"
+
+
+def test_fetch_offline_uses_cached_copy(server):
+    path = cache.fetch("state", 2023)
+    server.shutdown()
+    server.server_close()
+
+    with pytest.warns(UserWarning, match="using cached copy"):
+        assert cache.fetch("state", 2023, max_age=0) == path
+    assert read(path) == b"state v1"
+
+    # nothing cached to fall back to
+    with pytest.raises(requests.ConnectionError):
+        cache.fetch("county", 2023)
+
+
+def test_fetch_missing_file(server):
+    with pytest.raises(requests.HTTPError):
+        cache.fetch("place", 2023)
+
+
+def test_evict_least_recently_used(server):
+    paths = {dataset: cache.fetch(dataset, 2023) for dataset in ["state", "county", "tract"]}
+
+    # county is the least recently used, then state
+    index = cache._load_index()
+    for accessed, dataset in enumerate(["county", "state", "tract"]):
+        index[f"{dataset}/2023/us"]["accessed"] = accessed
+    cache._save_index(index)
+
+    size = len(b"state v1") + len(b"tract v1")
+    assert cache.evict(size) == size
+    assert not os.path.exists(paths["county"])
+    assert os.path.exists(paths["state"]) and os.path.exists(paths["tract"])
+    assert sorted(cache._load_index()) == ["state/2023/us", "tract/2023/us"]
+
+    # an evicted file is downloaded again
+    assert read(cache.fetch("county", 2023)) == b"county v1"
+    assert len(server.requests) == 4
+
+
+def test_clear(server):
+    path = cache.fetch("state", 2023)
+    cache.clear()
+    assert not os.path.exists(path)
+    assert cache._load_index() == {}
@@ -0,0 +1,202 @@
+import json
+
+import geopandas as gpd
+import pandas as pd
+import pytest
+import requests
+from shapely import box
+
+from maptools import cache, census_vars
+
+
+def test_to_numeric_downcasts():
+    data = pd.DataFrame({
+        "a": ["1", "2", "-666666666"],
+        "b": ["1.5", "2.25", "3"],
+        "c": ["100000", "2", "3"],
+        "d": ["0.1", "x", None],
+    })
+    result = census_vars.to_numeric(data)
+    assert list(result.columns) == ["a", "b", "c", "d"]
+    assert result.dtypes.astype(str).to_dict() == {"a": "Int8", "b": "float32", "c": "int32", "d": "float64"}
+    # sentinels are missing
+    assert result.a.isna().tolist() == [False, False, True]
+    assert result.a.iloc[:2].tolist() == [1, 2]
+    assert result.b.tolist() == [1.5, 2.25, 3.0]
+    assert result.c.tolist() == [100000, 2, 3]
+    assert result.d.iloc[0] == 0.1 and result.d.iloc[1:].isna().all()
+
+
+def test_to_numeric_types():
+    data = pd.DataFrame({"a": ["1", "2"], "b": ["1", "2"]})
+    result = census_vars.to_numeric(data, pd.Series({"a": "float", "b": "int"}))
+    assert result.dtypes.astype(str).to_dict() == {"a": "float32", "b": "int8"}
+
+
+def test_to_numeric_no_columns():
+    data = pd.DataFrame(index=range(3))
+    assert census_vars.to_numeric(data).shape == (3, 0)
+
+
+def test_de_dup():
+    aliases = {"B01001_001E": "total", "B01001_002E": "male", "B01003_001E": "total"}
+    assert census_vars.de_dup(aliases) == {
+        "B01001_001E": "total_(var)",
+        "B01001_002E": "male",
+        "B01003_001E": "total",
+    }
+    assert census_vars.de_dup({"a": "x", "b": "y"}) == {"a": "x", "b": "y"}
+
+
+@pytest.fixture
+def census_api(http_server, cache_dir, monkeypatch):
+    monkeypatch.setattr(census_vars, "_catalogs", {})
+    monkeypatch.setattr(census_vars, "_variables_links", {})
+    variables = {"variables": {
+        "B01001_001E": {"label": "Estimate!!Total:", "concept": "SEX BY AGE",
+                        "predicateType": "int", "group": "B01001", "limit": 0},
+        "for": {"label": "Census API FIPS 'for' clause", "predicateType": "fips-for",
+                "group": "N/A", "limit": 0, "predicateOnly": True},
+    }}
+    link = f"{http_server.url}/data/2022/acs/acs5/variables.json"
+    metadata = {"dataset": [{"c_variablesLink": link}]}
+    http_server.files["/data/2022/acs/acs5.json"] = (json.dumps(metadata).encode(), None)
+    http_server.files["/data/2022/acs/acs5/variables.json"] = (json.dumps(variables).encode(), None)
+    return http_server
+
+
+def test_catalog_is_downloaded_once(census_api):
+    meta = f"{census_api.url}/data/2022/acs/acs5.json"
+    cv = census_vars.catalog(meta)
+    assert cv.set_index("var").loc["B01001_001E", ["var_name", "type"]].tolist() == ["total", "int"]
+
+    # the metadata link and the catalog are remembered
+    assert census_vars.catalog(meta) is cv
+    assert census_vars.catalog(f"{census_api.url}/data/2022/acs/acs5") is cv
+    assert [path for path, etag in census_api.requests] == ["/data/2022/acs/acs5.json",
+                                                           "/data/2022/acs/acs5/variables.json"]
+
+    # and kept on disk for the next session
+    census_vars._catalogs.clear()
+    assert census_vars.catalog(f"{census_api.url}/data/2022/acs/acs5").var.tolist() == cv.var.tolist()
+    assert len(census_api.requests) == 2
+
+
+@pytest.fixture
+def boundaries(http_server, cache_dir, zip_shapefile, monkeypatch):
+    monkeypatch.setattr(cache, "TIGER_URL", http_server.url)
+    states = gpd.GeoDataFrame({"STATEFP": ["36"]}, geometry=[box(0, 0, 10, 10)], crs="EPSG:4269")
+    tracts = gpd.GeoDataFrame({
+        "GEOID": ["36061000100", "36061000200"],
+        "STATEFP": ["36", "36"],
+        "COUNTYFP": ["061", "061"],
+        "TRACTCE": ["000100", "000200"],
+    }, geometry=[box(1, 1, 2, 2), box(9, 9, 11, 11)], crs="EPSG:4269")
+    http_server.files["/GENZ2018/shp/cb_2018_us_state_500k.zip"] = \
+        (zip_shapefile(states, "cb_2018_us_state_500k"), None)
+    http_server.files["/TIGER2022/TRACT/tl_2022_36_tract.zip"] = \
+        (zip_shapefile(tracts, "tl_2022_36_tract"), None)
+    return http_server
+
+
+def test_merge_tracts(boundaries):
+    df = pd.DataFrame({"ucgid": ["1400000US36061000200", "1400000US36061000100"], "B01001_001E": [20, 10]})
+    result = census_vars.merge_tracts(df, max_workers=2)
+    assert result.geoid.tolist() == ["36061000100", "36061000200"]
+    assert result.b01001_001e.tolist() == [10, 20]
+    assert list(result.columns[-4:]) == ["statefp", "countyfp", "tractce", "geometry"]
+    # clipped to the shoreline
+    assert result.geometry.area.tolist() == pytest.approx([1, 1])
+    # the caller's frame isn't changed
+    assert list(df.columns) == ["ucgid", "B01001_001E"]
+
+
+def test_merge_tracts_empty():
+    df = pd.DataFrame({"ucgid": pd.Series([], dtype=object), "B01001_001E": pd.Series([], dtype=int)})
+    result = census_vars.merge_tracts(df)
+    assert len(result) == 0
+    assert "geometry" in result.columns
+
+
+@pytest.fixture
+def catalog_vars(cache_dir, monkeypatch):
+    variables = pd.DataFrame({
+        "var": ["B01001_001E", "B19013_001E", "B11001_001E", "B11001_002E"],
+        "group": ["B01001", "B19013", "B11001", "B11001"],
+        "concept": ["SEX BY AGE", "MEDIAN HOUSEHOLD INCOME", "HOUSEHOLD TYPE", "HOUSEHOLD TYPE"],
+        "label": ["Estimate!!Total:", "Estimate!!Median household income",
+                  "Estimate!!Total:", "Estimate!!Total:!!Family households:"],
+    })
+    monkeypatch.setattr(census_vars, "census_vars", variables)
+    monkeypatch.setattr(census_vars, "census_tables", variables[["group", "concept"]].drop_duplicates())
+    monkeypatch.setattr(census_vars, "_search_indexes", {})
+    return variables
+
+
+def test_lookup(catalog_vars):
+    found = census_vars.lookup("household income")
+    assert found.group.tolist() == ["B19013", "B11001"]
+    assert found.match.is_monotonic_decreasing
+    assert census_vars.lookup("household income", results=1).group.tolist() == ["B19013"]
+    assert len(census_vars.lookup("zebra")) == 0
+
+
+def test_lookup_labels(catalog_vars):
+    found = census_vars.lookup("family households", on="label")
+    assert found["var"].tolist() == ["B11001_002E"]
+    assert "text" not in found.columns
+    with pytest.raises(ValueError):
+        census_vars.lookup("total", on="group")
+
+
+def test_search_index_is_saved(catalog_vars, monkeypatch):
+    index = census_vars.search_index()
+    assert census_vars.search_index() is index
+
+    # a new session loads the fitted index instead of the catalog
+    census_vars._search_indexes.clear()
+    monkeypatch.setattr(census_vars, "census_tables", None)
+    monkeypatch.setattr(census_vars, "_init_vars", None)
+    assert census_vars.search_index()["docs"].group.tolist() == index["docs"].group.tolist()
+
+
+VALUES = {"B01001_001E": ["100", "200"], "B19013_001E": ["50000", "60000"], "B11001_001E": ["40", "80"]}
+
+
+@pytest.fixture
+def census_data(http_server):
+    def data(query):
+        columns = query["get"][0].split(",")
+        if any(c not in VALUES and c != "NAME" for c in columns):
+            return 400, b"error: unknown variable"
+        rows = [["Kings County", "Queens County"] if c == "NAME" else VALUES[c] for c in columns]
+        rows.append(["0500000US36047", "0500000US36081"])
+        rows = [list(row) for row in zip(*rows)]
+        if "NAME" not in columns:
+            # the chunks don't have to come back in the same order
+            rows.reverse()
+        return 200, json.dumps([columns + ["ucgid"]] + rows).encode()
+
+    http_server.files["/data/2022/acs/acs5"] = data
+    return f"{http_server.url}/data/2022/acs/acs5"
+
+
+def test_get_batch(census_data, http_server):
+    variables = ["B01001_001E", "B19013_001E", "NAME", "B01001_001E", "B11001_001E"]
+    result = census_vars.get_batch(census_data, variables, "0500000US36047,0500000US36081",
+                                   key="abc", chunk_size=2, raw=True)
+    assert list(result.columns) == ["ucgid", "NAME", "B01001_001E", "B19013_001E", "B11001_001E"]
+    result = result.set_index("ucgid").sort_index()
+    assert result.NAME.tolist() == ["Kings County", "Queens County"]
+    for var, values in VALUES.items():
+        assert result[var].tolist() == values
+
+    # two chunks, with NAME added to the first
+    paths = [path for method, path, headers in http_server.log]
+    assert len(paths) == 2
+    assert all("key=abc" in path for path in paths)
+
+
+def test_get_batch_fails(census_data):
+    with pytest.raises(requests.HTTPError):
+        census_vars.get_batch(census_data, ["B01001_001E", "B99999_001E"], "0500000US36047", chunk_size=1, raw=True)
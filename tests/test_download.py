@@ -0,0 +1,160 @@
+import json
+import os
+import time
+
+import pytest
+import requests
+
+from maptools import download, tiger
+
+
+@pytest.fixture
+def archive(http_server, tmp_path):
+    http_server.files["/tl_2023_36_place.zip"] = (b"0123456789", '"v1"')
+    url = f"{http_server.url}/tl_2023_36_place.zip"
+    return url, str(tmp_path / "tl_2023_36_place.zip")
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def last_get(server):
+    return [headers for method, path, headers in server.log if method == "GET"][-1]
+
+
+def test_remote_info(http_server, archive):
+    url, filename = archive
+    info = download.remote_info(download.make_session(), url)
+    assert info == {"size": 10, "last_modified": None, "etag": '"v1"'}
+
+
+def test_resume_download(http_server, archive):
+    url, filename = archive
+    session = download.make_session()
+    assert download.resume_download(session, url, filename, download.remote_info(session, url)) == filename
+    assert read(filename) == b"0123456789"
+    assert not os.path.exists(filename + ".part") and not os.path.exists(filename + ".part.json")
+
+
+def write_part(filename, data, etag=None):
+    with open(filename + ".part", "wb") as f:
+        f.write(data)
+    if etag:
+        with open(filename + ".part.json", "w") as f:
+            json.dump({"etag": etag, "last_modified": None}, f)
+
+
+def test_resume_download_resumes(http_server, archive):
+    url, filename = archive
+    write_part(filename, b"0123", '"v1"')
+    session = download.make_session()
+    download.resume_download(session, url, filename, download.remote_info(session, url))
+    headers = last_get(http_server)
+    assert (headers["Range"], headers["If-Range"]) == ("bytes=4-", '"v1"')
+    assert read(filename) == b"0123456789"
+    assert not os.path.exists(filename + ".part.json")
+
+
+def test_resume_download_changed(http_server, archive):
+    url, filename = archive
+    # started on an older version of the file: the server sends all of the new one
+    write_part(filename, b"abcd", '"v0"')
+    session = download.make_session()
+    download.resume_download(session, url, filename, download.remote_info(session, url))
+    assert last_get(http_server)["If-Range"] == '"v0"'
+    assert read(filename) == b"0123456789"
+
+
+def test_resume_download_without_validator(http_server, archive):
+    url, filename = archive
+    write_part(filename, b"abcd")
+    session = download.make_session()
+    download.resume_download(session, url, filename, download.remote_info(session, url))
+    assert "Range" not in last_get(http_server)
+    assert read(filename) == b"0123456789"
+
+
+def test_sync_archive(http_server, archive, tmp_path):
+    url, filename = archive
+    session = download.make_session()
+    partition = tmp_path / "store" / "STATEFP=36" / "tl_2023_36_place.parquet"
+    converted = []
+
+    def convert(z):
+        converted.append(read(z))
+        partition.parent.mkdir(parents=True, exist_ok=True)
+        partition.write_bytes(b"")
+        return [str(partition)]
+
+    manifest = {}
+    output = tiger.sync_archive(session, url, filename, manifest, convert)
+    assert output == [str(partition)]
+    assert manifest["tl_2023_36_place.zip"]["output"] == output
+    assert converted == [b"0123456789"]
+    downloads = len(http_server.requests)
+
+    # unchanged: nothing is downloaded or converted
+    assert tiger.sync_archive(session, url, filename, manifest, convert) == output
+    assert len(converted) == 1 and len(http_server.requests) == downloads
+
+    # the state's partition is gone: converted again from the archive on disk
+    os.remove(partition)
+    tiger.sync_archive(session, url, filename, manifest, convert)
+    assert len(converted) == 2 and len(http_server.requests) == downloads
+
+    # changed on the server: downloaded and converted again
+    http_server.files["/tl_2023_36_place.zip"] = (b"0123456789AB", '"v2"')
+    tiger.sync_archive(session, url, filename, manifest, convert)
+    assert converted[-1] == b"0123456789AB"
+    assert manifest["tl_2023_36_place.zip"]["size"] == 12
+
+
+class Flaky:
+    """Fails with `error` the first `failures` times it is called with an item."""
+
+    def __init__(self, failures, error):
+        self.failures = failures
+        self.error = error
+        self.calls = {}
+
+    def __call__(self, item):
+        self.calls[item] = self.calls.get(item, 0) + 1
+        if self.calls[item] <= self.failures.get(item, 0):
+            raise self.error
+        return item * 2
+
+
+def test_retry():
+    func = Flaky({1: 2}, requests.ConnectionError("reset"))
+    assert download.retry(func, 1, retries=2, backoff=0) == 2
+    assert func.calls[1] == 3
+
+    with pytest.raises(requests.ConnectionError):
+        download.retry(Flaky({1: 3}, requests.ConnectionError("reset")), 1, retries=2, backoff=0)
+    # not transient, so not retried
+    func = Flaky({1: 1}, ValueError("bad"))
+    with pytest.raises(ValueError):
+        download.retry(func, 1, retries=2, backoff=0)
+    assert func.calls[1] == 1
+
+
+def test_fetch_all():
+    func = Flaky({2: 1, 3: 5}, requests.ConnectionError("reset"))
+    progress = []
+    results, failures = download.fetch_all([1, 2, 3], func, max_workers=2, retries=2, backoff=0,
+                                           progress=lambda done, total, item, error: progress.append((done, total)))
+    assert sorted(results) == [2, 4]
+    assert [failure["item"] for failure in failures] == [3]
+    assert isinstance(failures[0]["error"], requests.ConnectionError)
+    assert sorted(progress) == [(1, 3), (2, 3), (3, 3)]
+
+
+def test_rate_limiter():
+    wait = download.rate_limiter(20)
+    start = time.monotonic()
+    for _ in range(5):
+        wait()
+    # the first call doesn't wait, the other four are 1/20 s apart
+    assert time.monotonic() - start >= 0.19
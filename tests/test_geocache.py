@@ -0,0 +1,65 @@
+import threading
+import time
+
+import pytest
+
+from maptools import geocache
+
+
+class Location:
+    def __init__(self, latitude, longitude):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.raw = {"display_name": "179 Livingston St"}
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "geocode.sqlite")
+
+
+def test_cache_key():
+    assert geocache.cache_key(" 179 Livingston St, Brooklyn, NY 11201") == "179 LIVINGSTON ST, BROOKLYN, NY 11201|"
+    assert geocache.cache_key("a", (1, 2, 3, 4)) == "A|[1, 2, 3, 4]"
+
+
+def test_put_and_get(db):
+    geocache.put_many([
+        {"key": "A|", "lookup": "a", "viewbox": None, "location": Location(40.69, -73.99)},
+        {"key": "B|", "lookup": "b", "viewbox": None, "location": None},
+    ], db)
+    assert geocache.get_many(["A|", "B|", "C|"], db) == {
+        "A|": {"found": True, "lat": 40.69, "lon": -73.99, "payload": {"display_name": "179 Livingston St"}},
+        "B|": {"found": False, "lat": None, "lon": None, "payload": None},
+    }
+
+    # a later result replaces the old one
+    geocache.put_many([{"key": "B|", "lookup": "b", "viewbox": None, "location": Location(1, 2)}], db)
+    assert geocache.get_many(["B|"], db)["B|"]["found"]
+
+
+def test_many_keys(db):
+    keys = [f"{i}|" for i in range(1200)]
+    geocache.put_many([{"key": key, "lookup": key, "location": None} for key in keys], db)
+    assert len(geocache.get_many(keys, db)) == 1200
+
+
+def test_misses_expire(db):
+    geocache.put_many([{"key": "A|", "lookup": "a", "location": None},
+                       {"key": "B|", "lookup": "b", "location": Location(1, 2)}], db)
+    time.sleep(0.01)
+    # hits never expire
+    assert list(geocache.get_many(["A|", "B|"], db, miss_ttl=0)) == ["B|"]
+    assert geocache.purge(db, miss_ttl=0) == 1
+    assert list(geocache.get_many(["A|", "B|"], db)) == ["B|"]
+
+
+def test_connections_per_thread(db):
+    conn = geocache.connect(db)
+    assert geocache.connect(db) is conn
+
+    others = []
+    thread = threading.Thread(target=lambda: others.append(geocache.connect(db)))
+    thread.start()
+    thread.join()
+    assert others[0] is not conn
@@ -0,0 +1,45 @@
+import geopandas as gpd
+import pandas as pd
+import pytest
+from shapely import Point, box
+
+from maptools import cache, geography
+
+
+def write(level, geoids, geoms, statefp=None):
+    gdf = gpd.GeoDataFrame({"GEOID": geoids}, geometry=geoms, crs="EPSG:4269")
+    gdf.to_parquet(geography.boundaries_path(level, 2023, statefp))
+
+
+@pytest.fixture
+def boundaries(http_server, cache_dir, monkeypatch):
+    # there are no tracts for state 34, and nothing to download them from
+    monkeypatch.setattr(cache, "TIGER_URL", http_server.url)
+    write("state", ["36", "34"], [box(0, 0, 10, 10), box(10, 0, 20, 10)])
+    write("county", ["36061", "36047", "34001"], [box(0, 0, 5, 10), box(5, 0, 10, 10), box(10, 0, 20, 10)])
+    write("tract", ["36061000100"], [box(0, 0, 5, 5)], statefp="36")
+    geography._indexed.cache_clear()
+    yield
+    geography._indexed.cache_clear()
+
+
+def test_assign_geographies(boundaries):
+    points = gpd.GeoDataFrame({"n": range(5)}, geometry=[Point(1, 1), Point(6, 6), Point(15, 5), Point(50, 50), None],
+                              index=list("abcde"))
+    with pytest.warns(UserWarning, match="No tract boundaries for state 34"):
+        result = geography.assign_geographies(points)
+    assert result.index.tolist() == list("abcde")
+    assert result.n.tolist() == list(range(5))
+    assert result.state_geoid.tolist() == ["36", "36", "34", pd.NA, pd.NA]
+    assert result.county_geoid.tolist() == ["36061", "36047", "34001", pd.NA, pd.NA]
+    assert result.tract_geoid.tolist() == ["36061000100", pd.NA, pd.NA, pd.NA, pd.NA]
+    assert result.tract_geoid.dtype == "string"
+    assert list(points.columns) == ["n", "geometry"]
+
+
+def test_assign_geographies_bad_columns(boundaries):
+    points = gpd.GeoDataFrame({"county_geoid": ["x"]}, geometry=[Point(1, 1)])
+    with pytest.raises(ValueError, match="already has"):
+        geography.assign_geographies(points)
+    with pytest.raises(ValueError, match="Unknown geography"):
+        geography.assign_geographies(points, levels=["zip"])
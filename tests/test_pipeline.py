@@ -0,0 +1,90 @@
+import os
+
+import geopandas as gpd
+import pandas as pd
+import pytest
+
+from maptools import pipeline
+
+ADDRESSES = [f"{n} Livingston St, Brooklyn, NY 11201" for n in [10, 20, 30, 41, 51]]
+
+
+class Stop(Exception):
+    pass
+
+
+@pytest.fixture(params=["csv", "parquet"])
+def addresses(request, tmp_path):
+    df = pd.DataFrame({"address": ADDRESSES})
+    path = str(tmp_path / f"addresses.{request.param}")
+    if request.param == "csv":
+        df.to_csv(path, index=False)
+    else:
+        df.to_parquet(path, index=False)
+    return path
+
+
+def run(path, out_dir, index, **kwargs):
+    return pipeline.run(path, out_dir, index=index, levels=None, chunk_size=2, **kwargs)
+
+
+def test_read_chunks(addresses):
+    assert [len(chunk) for chunk in pipeline.read_chunks(addresses, 2)] == [2, 2, 1]
+    chunks = pipeline.read_chunks(addresses, 2, skip=3)
+    assert pd.concat(chunks).address.tolist() == ADDRESSES[3:]
+    assert list(pipeline.read_chunks(addresses, 2, skip=5)) == []
+
+
+def test_run(addresses, tmp_path, address_index):
+    out_dir = str(tmp_path / "out")
+    checkpoint = run(addresses, out_dir, address_index)
+    assert (checkpoint["chunks"], checkpoint["rows"], checkpoint["read"]) == (3, 5, 5)
+    assert checkpoint["status"] == {"ok": 5}
+
+    result = gpd.read_parquet(out_dir)
+    assert sorted(result.address) == sorted(ADDRESSES)
+    assert result.geometry.notna().all()
+
+
+def test_run_again_does_nothing(addresses, tmp_path, address_index):
+    out_dir = str(tmp_path / "out")
+    first = run(addresses, out_dir, address_index)
+    files = sorted(os.listdir(out_dir))
+
+    written = []
+    second = run(addresses, out_dir, address_index, progress=lambda n, rows: written.append(n))
+    assert written == []
+    assert second == first
+    assert sorted(os.listdir(out_dir)) == files
+
+
+def test_run_resumes(addresses, tmp_path, address_index, monkeypatch):
+    out_dir = str(tmp_path / "out")
+
+    def stop(n, rows):
+        raise Stop()
+
+    with pytest.raises(Stop):
+        run(addresses, out_dir, address_index, progress=stop)
+    assert pipeline.load_checkpoint(out_dir)["read"] == 2
+
+    # only the rows after the checkpoint are read again
+    geocoded = []
+    geocode_chunk = pipeline.geocode_chunk
+
+    def counting(chunk, *args, **kwargs):
+        geocoded.append(chunk.address.tolist())
+        return geocode_chunk(chunk, *args, **kwargs)
+
+    monkeypatch.setattr(pipeline, "geocode_chunk", counting)
+    checkpoint = run(addresses, out_dir, address_index)
+    assert geocoded == [ADDRESSES[2:4], ADDRESSES[4:]]
+    assert (checkpoint["chunks"], checkpoint["rows"]) == (3, 5)
+    assert sorted(gpd.read_parquet(out_dir).address) == sorted(ADDRESSES)
+
+
+def test_run_other_input(addresses, tmp_path, address_index):
+    out_dir = str(tmp_path / "out")
+    run(addresses, out_dir, address_index)
+    with pytest.raises(ValueError):
+        pipeline.run(addresses, out_dir, index=address_index, levels=None, chunk_size=3)
@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+from maptools import streets
+
+
+def test_house_number():
+    numbers = streets.house_number(pd.Series(["179", "34-12", "x", None]))
+    assert numbers.iloc[:2].tolist() == [179.0, 3412.0]
+    assert numbers.iloc[2:].isna().all()
+
+
+def test_address_ranges(address_index):
+    assert address_index.street.tolist() == ["LIVINGSTON ST", "LIVINGSTON ST"]
+    assert address_index.side.tolist() == ["R", "L"]
+    assert address_index[["lo", "hi"]].to_numpy().tolist() == [[0, 100], [1, 101]]
+
+
+def test_geocode_interpolates(address_index):
+    df = pd.DataFrame({"address": ["50 Livingston St, Brooklyn, NY 11201",
+                                   "51 Livingston Street, Brooklyn, NY 11201"]})
+    result = streets.geocode(df, address_index)
+    assert result.status.tolist() == ["ok", "ok"]
+    # halfway along the block, on either side
+    assert result.lon.tolist() == pytest.approx([-73.995, -73.995])
+    assert result.lat.tolist() == pytest.approx([40.7, 40.7])
+    assert result.geometry.x.tolist() == pytest.approx([-73.995, -73.995])
+
+
+def test_geocode_unmatched(address_index):
+    df = pd.DataFrame({"address": ["500 Livingston St, Brooklyn, NY 11201",
+                                   "5 Court St, Brooklyn, NY 11201",
+                                   "50 Livingston St, Brooklyn, NY 10001",
+                                   "Livingston St, Brooklyn, NY 11201",
+                                   "nowhere"]})
+    result = streets.geocode(df, address_index)
+    assert result.status.tolist() == ["no_range", "no_street", "no_street", "no_number", "unparsed"]
+    assert result.lat.isna().all()
+    assert result.geometry.isna().all()
+
+
+def test_geocode_nothing_to_look_up(address_index):
+    df = pd.DataFrame({"address": ["Livingston St, Brooklyn, NY 11201"]})
+    result = streets.geocode(df, address_index)
+    assert result.status.tolist() == ["no_number"]
+    assert result.geometry.isna().all()
+
+
+def test_geocode_empty(address_index):
+    df = pd.DataFrame({"address": pd.Series([], dtype=object)})
+    result = streets.geocode(df, address_index)
+    assert len(result) == 0
+    assert {"lat", "lon", "lookup_address", "status", "geometry"} <= set(result.columns)
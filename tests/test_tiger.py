@@ -0,0 +1,49 @@
+import os
+
+import geopandas as gpd
+import pytest
+from shapely import box
+
+from maptools import tiger
+
+
+@pytest.fixture
+def places():
+    return gpd.GeoDataFrame({
+        "STATEFP": ["01", "36", "36"],
+        "NAME": ["Mobile", "Albany", "Buffalo"],
+    }, geometry=[box(-88, 30, -87, 31), box(-74, 42, -73, 43), box(-79, 42, -78, 43)], crs="EPSG:4269")
+
+
+def test_parquet_store(places, tmp_path):
+    store = str(tmp_path / "PLACE.parquet")
+    files = tiger.write_parquet(places, store, "tl_2023_place")
+    assert files == [os.path.join(store, "STATEFP=01", "tl_2023_place.parquet"),
+                     os.path.join(store, "STATEFP=36", "tl_2023_place.parquet")]
+
+    everything = tiger.read_parquet(store)
+    assert sorted(everything.NAME) == ["Albany", "Buffalo", "Mobile"]
+    # partition values stay strings
+    assert sorted(everything.STATEFP.unique()) == ["01", "36"]
+    assert everything.crs == places.crs
+
+    ny = tiger.read_parquet(store, columns=["NAME"], states=["NY"])
+    assert sorted(ny.NAME) == ["Albany", "Buffalo"]
+    assert "geometry" in ny.columns
+    assert tiger.read_parquet(store, states=["01"]).NAME.tolist() == ["Mobile"]
+    assert tiger.read_parquet(store, bbox=(-75, 41, -72, 44)).NAME.tolist() == ["Albany"]
+
+
+def test_read_zip(places, tmp_path, zip_shapefile):
+    data = zip_shapefile(places, "tl_2023_us_place")
+    path = tmp_path / "tl_2023_us_place.zip"
+    path.write_bytes(data)
+
+    from_file = tiger.read_zip(str(path))
+    assert from_file.NAME.tolist() == ["Mobile", "Albany", "Buffalo"]
+    assert from_file.crs == places.crs
+    # nothing is extracted next to the archive
+    assert sorted(os.listdir(tmp_path)) == sorted(["tl_2023_us_place.zip", "tl_2023_us_place_shp"])
+
+    from_bytes = tiger.read_zip(data)
+    assert from_bytes.NAME.tolist() == from_file.NAME.tolist()
@@ -0,0 +1,187 @@
+import folium
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+from folium.plugins import MarkerCluster
+from shapely import LineString, Point, Polygon, box
+
+from maptools import ui
+
+TRIANGLE = Polygon([(0, 0), (10, 0), (0, 10)])
+
+
+@pytest.fixture
+def blocks():
+    return gpd.GeoDataFrame({"n": [250, 100, 40], "group": ["a", "b", "b"]},
+                            geometry=[box(0, 0, 1, 1), TRIANGLE, box(20, 20, 21, 21)], crs="EPSG:3857")
+
+
+def test_sample_xy():
+    x, y = ui.sample_xy(TRIANGLE, 100, np.random.default_rng(1))
+    assert len(x) == len(y) == 100
+    assert shapely.contains_xy(TRIANGLE, x, y).all()
+
+
+def test_sample_xy_gives_up():
+    with pytest.warns(UserWarning, match="Only placed 0 of 5"):
+        x, y = ui.sample_xy(LineString([(0, 0), (1, 1)]), 5, np.random.default_rng(1), max_rounds=3)
+    assert len(x) == 0
+
+
+def test_rand_points():
+    points = ui.rand_points(TRIANGLE, 20, seed=7)
+    assert len(points) == 20
+    assert points.geometry.apply(TRIANGLE.contains).all()
+    assert shapely.equals(points.geometry.to_numpy(), ui.rand_points(TRIANGLE, 20, seed=7).geometry.to_numpy()).all()
+
+    with pytest.warns(DeprecationWarning):
+        ui.rand_points(TRIANGLE, 1, max_conflicts=10)
+
+
+def test_dot_density(blocks):
+    dots = ui.dot_density(blocks, scale=100, color="group", seed=3)
+    assert list(dots.columns) == ["geometry", "color"]
+    assert dots.color.tolist() == ["a", "a", "b"]
+    assert dots.crs == blocks.crs
+    inside = [blocks.geometry.iloc[i].contains(dot) for i, dot in zip([0, 0, 1], dots.geometry)]
+    assert all(inside)
+    # the same seed gives the same dots
+    assert dots.geom_equals(ui.dot_density(blocks, scale=100, color="group", seed=3).geometry).all()
+
+
+def test_dot_density_parallel(blocks):
+    serial = ui.dot_density(blocks, scale=10, color="group", seed=5)
+    parallel = ui.dot_density(blocks, scale=10, color="group", seed=5, max_workers=2, chunk_size=1)
+    # the dots don't depend on how the frame is split between processes
+    assert len(parallel) == len(serial) == 39
+    assert parallel.color.tolist() == serial.color.tolist()
+    assert parallel.geom_equals(serial.geometry).all()
+
+
+def test_dot_density_parallel_empty(blocks):
+    dots = ui.dot_density(blocks.iloc[:0], seed=5, max_workers=2)
+    assert len(dots) == 0
+    assert list(dots.columns) == ["geometry", "color"]
+
+
+def test_write_dot_density(blocks, tmp_path):
+    path = str(tmp_path / "dots.parquet")
+    assert ui.write_dot_density(blocks, path, scale=10, color="group", seed=5, chunk_size=2, max_workers=2) == 39
+    dots = gpd.read_parquet(path)
+    assert dots.crs == blocks.crs
+    assert dots.geom_equals(ui.dot_density(blocks, scale=10, color="group", seed=5).geometry).all()
+
+
+@pytest.fixture
+def stacked():
+    # three points on top of each other and one on its own, at the equator
+    return gpd.GeoDataFrame({"group": ["b", "a", "a", "a", None], "r": [111320, 111320, 111320, 111320, 1]},
+                            geometry=[Point(1, 0), Point(0, 0), Point(0, 0), Point(0, 0), Point(5, 5)],
+                            crs="EPSG:4326")
+
+
+def test_cluster_radial(stacked):
+    result = ui.cluster_radial(stacked, "group", 111320)
+    assert result.group.tolist() == ["a", "a", "a", "b"]
+    assert result.crs == stacked.crs
+    # one degree around the center, evenly spaced
+    angles = np.deg2rad([0, 120, 240, 0])
+    assert result.geometry.x.tolist() == pytest.approx(np.cos(angles) + [0, 0, 0, 1], abs=1e-4)
+    assert result.geometry.y.tolist() == pytest.approx(np.sin(angles), abs=1e-4)
+    assert [spoke.coords[0] for spoke in result.spoke_geom] == [(0, 0), (0, 0), (0, 0), (1, 0)]
+    assert shapely.equals(shapely.get_point(result.spoke_geom.to_numpy(), 1), result.geometry.to_numpy()).all()
+
+
+def test_cluster_radial_radius(stacked):
+    expected = ui.cluster_radial(stacked, "group", 111320).geometry
+    by_column = ui.cluster_radial(stacked, "group", "r")
+    by_row = ui.cluster_radial(stacked, "group", lambda center, row: row.r)
+    batched = ui.cluster_radial(stacked, "group", lambda centers, df: df.r * (centers.x >= 0), batched=True)
+    for result in [by_column, by_row, batched]:
+        assert result.geometry.geom_equals_exact(expected, tolerance=1e-9).all()
+
+
+def test_feature_collection():
+    points = gpd.GeoSeries([Point(-73.9912345678, 40.69), Point(-74, 40.7)])
+    collection = ui._feature_collection(points, {"tooltip": ["a", None], "n": [1.5, np.nan]})
+    assert collection["type"] == "FeatureCollection"
+    assert [f["geometry"]["coordinates"] for f in collection["features"]] == [[-73.991235, 40.69], [-74, 40.7]]
+    assert [f["properties"] for f in collection["features"]] == [{"tooltip": "a", "n": 1.5},
+                                                                  {"tooltip": None, "n": None}]
+    assert ui._feature_collection(points.iloc[:0]) == {"type": "FeatureCollection", "features": []}
+
+
+def test_point_layer():
+    m = folium.Map()
+    data = ui._feature_collection(gpd.GeoSeries([Point(-73.99, 40.69)]), {"tooltip": ["Brooklyn"]})
+    layer = ui.PointLayer(data, options={"radius": 4}).add_to(m)
+    html = m.get_root().render()
+    assert f"var {layer.get_name()} = L.geoJson(" in html
+    assert "Brooklyn" in html and "L.circleMarker(latlng, options)" in html
+    assert f"{layer.get_name()}.addTo({m.get_name()})" in html
+
+    label = ui.PointLayer(data, kind="label", cull=True).add_to(m)
+    html = m.get_root().render()
+    assert "L.divIcon" in html
+    assert f"{label.get_name()}.addTo" not in html and "map.on(\"moveend\", update)" in html
+
+
+@pytest.fixture
+def layers():
+    return gpd.GeoDataFrame({
+        "layer": ["a", "a", "b"],
+        "color": ["red", "red", "blue"],
+        "title": ["one", "two", "three"],
+    }, geometry=[Point(-74, 40.7), Point(-73.99, 40.7), Point(-73.98, 40.71)], crs="EPSG:4326")
+
+
+def points_of(m):
+    """The PointLayers added by map_layers, by layer name."""
+    found = {}
+    for group in m._children.values():
+        if isinstance(group, folium.FeatureGroup):
+            children = list(group._children.values())
+            if children and isinstance(children[0], MarkerCluster):
+                children = list(children[0]._children.values())
+            found[group.layer_name] = children
+    return found
+
+
+def test_map_layers_geojson(layers):
+    m = ui.map_layers(folium.Map(), layers, mode="geojson")
+    found = points_of(m)
+    assert sorted(found) == ["a", "b"]
+    assert all(len(children) == 1 and isinstance(children[0], ui.PointLayer) for children in found.values())
+    data = found["a"][0].data
+    assert [f["properties"]["tooltip"] for f in data["features"]] == ["one", "two"]
+    assert data["features"][0]["properties"]["style"] == {"color": "red", "fillColor": "red"}
+    assert found["a"][0].kind == "circle" and not found["a"][0].cull
+
+
+def test_map_layers_markers(layers):
+    m = ui.map_layers(folium.Map(), layers)
+    assert [len(children) for children in points_of(m).values()] == [2, 1]
+    assert all(isinstance(c, folium.Circle) for children in points_of(m).values() for c in children)
+
+
+def test_map_layers_cluster(layers):
+    m = ui.map_layers(folium.Map(), layers, mode="cluster")
+    clusters = [list(group._children.values())[0] for group in m._children.values()
+                if isinstance(group, folium.FeatureGroup)]
+    assert len(clusters) == 2
+    assert all(isinstance(cluster, MarkerCluster) for cluster in clusters)
+    assert all(not cluster.control for cluster in clusters)
+    assert "disableClusteringAtZoom" in m.get_root().render()
+    assert all(isinstance(points[0], ui.PointLayer) for points in points_of(m).values())
+
+
+def test_map_layers_cull(layers):
+    m = ui.map_layers(folium.Map(), layers, mode="cull")
+    assert all(points[0].cull for points in points_of(m).values())
+    assert m.get_root().render().count("getBounds().pad(0.2)") == 2
+
+
+def test_map_layers_unknown_mode(layers):
+    with pytest.raises(ValueError, match="Unknown mode"):
+        ui.map_layers(folium.Map(), layers, mode="heatmap")
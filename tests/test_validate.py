@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+
+from maptools import validate
+
+
+@pytest.fixture
+def index():
+    return validate.street_index(pd.Series(["Livingston Street", "SCHERMERHORN ST", "Boerum Place", "W 22nd St"]))
+
+
+@pytest.mark.parametrize("a, b, distance", [
+    ("", "", 0),
+    ("ABC", "", 3),
+    ("KITTEN", "SITTING", 3),
+    ("LIVINGSTON", "LIVINGSTN", 1),
+])
+def test_edit_distance(a, b, distance):
+    assert validate.edit_distance(a, b) == distance
+    assert validate.edit_distance(b, a) == distance
+    assert validate.edit_distance(a, b, max_distance=1) == min(distance, 2)
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("LIVINGSTON ST", ("LIVINGSTON ST", 0)),
+    ("LIVINGSTN ST", ("LIVINGSTON ST", 1)),
+    ("SCHERMERHRN ST", ("SCHERMERHORN ST", 1)),
+    ("LIVNGSTN ST", ("LIVINGSTON ST", 2)),
+    ("ZZZ ST", (None, None)),
+])
+def test_correct_street(index, name, expected):
+    assert validate.correct_street(name, index) == expected
+
+
+def test_correct_street_max_distance(index):
+    assert validate.correct_street("LIVNGSTN ST", index, max_distance=1) == (None, None)
+
+
+def test_correct_street_zip_code():
+    known = pd.DataFrame({"street": ["MAIN ST", "MAIN SQ"], "zip": ["11201", "11215"]})
+    index = validate.street_index(known)
+    assert validate.correct_street("MAIN ST", index, "11215") == ("MAIN SQ", 1)
+    assert validate.correct_street("MAIN ST", index, "11201") == ("MAIN ST", 0)
+    # a zip code the index doesn't know
+    assert validate.correct_street("MAIN ST", index, "10001") == ("MAIN ST", 0)
+
+
+def test_validate(index):
+    addresses = pd.Series(["12A Livingstn St, Brooklyn, NY 11201",
+                           "179 Livingston Street, Brooklyn, NY 11201",
+                           "Livingston St, Brooklyn, XX 11201"])
+    result = validate.validate(addresses, index)
+    # the letter of the house number is kept
+    assert result.street.tolist() == ["12A LIVINGSTON ST", "179 LIVINGSTON ST", "LIVINGSTON ST"]
+    assert result.number.iloc[:2].tolist() == ["12A", "179"]
+    assert result.corrected.tolist() == [True, False, False]
+    assert result.issues.tolist() == ["corrected_street", "", "no_number bad_state"]
+    assert result.score.tolist() == [90, 100, 30]
+    assert result.valid.tolist() == [True, True, False]